@@ -0,0 +1,340 @@
+# bench/crawl.py
+"""
+Офлайн-бенчмарк целого обхода: скраперы против локальной подмены сайтов и Splash.
+
+Запуск из корня репозитория:
+    python -m bench.crawl                                   -> все три скрапера, локальный mongod
+    python -m bench.crawl news labirint --latency-ms 100 --error-rate 0.05
+    python -m bench.crawl --mongo memory --out bench_crawl.json
+
+Сайты поднимает bench.site.LocalSites (задержка, доля 503, число страниц).
+Каждый скрапер запускается в отдельном процессе (Twisted-реактор не
+перезапускается, CPU и RSS меряются честно по процессу):
+    news     — адаптер lenta.ru (sources.py): crawl() по фронтиру, BASE_URL -> локальный lenta;
+    mvideo   — MvideoTrendingSpider без Playwright (обычный HTTP-обработчик);
+    labirint — LabirintBooksSpider, рейтинг через Splash-подмену, карточки HTTP.
+Scrapy-запросы к настоящим хостам переписывает LocalSiteMiddleware, а в ответе
+URL возвращается исходный — спайдеры и пайплайны видят привычные адреса.
+
+Mongo: --mongo URI (по умолчанию локальный mongod, базы bench_news/bench_crawl
+очищаются перед прогоном) или --mongo memory — mongomock, если установлен
+(индексы и time-series он только имитирует).
+
+На каждый прогон печатаем items/s, p50/p99 задержки item-а (от постановки
+запроса в очередь до записи item-а; у news — загрузка статьи), CPU и пиковый RSS.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from bench.parsers import percentile
+from bench.site import LocalSites
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRAPERS = ("news", "mvideo", "labirint")
+
+NEWS_DB = "bench_news"
+CRAWL_DB = "bench_crawl"
+MEMORY_URI = "mongodb://bench-memory"
+
+
+# --- Scrapy-часть (грузится в процессе-воркере) ---
+
+class LocalSiteMiddleware:
+    """Переписывает запросы к хостам из BENCH_HOSTS на локальные серверы, в ответе URL исходный."""
+
+    def __init__(self, hosts: dict[str, str]):
+        self.hosts = {host: url.rstrip("/") for host, url in hosts.items()}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(json.loads(os.environ["BENCH_HOSTS"]))
+
+    def process_request(self, request, spider):
+        parts = urlsplit(request.url)
+        local = self.hosts.get(parts.netloc)
+        if local is None or "bench_original_url" in request.meta:
+            return None
+        meta = dict(request.meta, bench_original_url=request.url)
+        path = parts.path + ("?" + parts.query if parts.query else "")
+        return request.replace(url=local + path, meta=meta)
+
+    def process_response(self, request, response, spider):
+        original = request.meta.get("bench_original_url")
+        return response.replace(url=original) if original else response
+
+
+class BenchProbe:
+    """Задержка item-а: от request_scheduled первого запроса цепочки до item_scraped."""
+
+    latencies: list[float] = []
+
+    def __init__(self, crawler):
+        from scrapy import signals
+
+        crawler.signals.connect(self.request_scheduled, signal=signals.request_scheduled)
+        crawler.signals.connect(self.item_scraped, signal=signals.item_scraped)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def request_scheduled(self, request, spider):
+        # request.replace (фолбэк на рендер, ретрай) копирует meta — время старта сохраняется
+        request.meta.setdefault("bench_started", time.monotonic())
+
+    def item_scraped(self, item, response, spider):
+        started = response.meta.get("bench_started")
+        if started is not None:
+            BenchProbe.latencies.append(time.monotonic() - started)
+
+
+def _merged(settings, spidercls, key: str, extra: dict) -> dict:
+    # cmdline-приоритет перетирает словарь целиком — сливаем с проектом и custom_settings спайдера
+    return {**settings.getdict(key), **(spidercls.custom_settings or {}).get(key, {}), **extra}
+
+
+def run_scrapy(name: str, args) -> tuple[int, list[float]]:
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.settings import Settings
+
+    if name == "mvideo":
+        sys.path.insert(0, str(ROOT / "lab5"))
+        import mvideo_main
+
+        spidercls = mvideo_main.MvideoTrendingSpider
+        settings = Settings()
+        overrides = {
+            # без браузера: scrapy-playwright в бенче не поднимаем, страницы статические
+            "DOWNLOAD_HANDLERS": {
+                "http": "scrapy.core.downloader.handlers.http.HTTPDownloadHandler",
+                "https": "scrapy.core.downloader.handlers.http.HTTPDownloadHandler",
+            },
+        }
+    else:
+        sys.path.insert(0, str(ROOT / "lab6"))
+        os.environ["SCRAPY_SETTINGS_MODULE"] = "books.settings"
+        from scrapy.utils.project import get_project_settings
+
+        from books.spiders.labirint_spider import LabirintBooksSpider as spidercls
+
+        settings = get_project_settings()
+        overrides = {
+            "SPLASH_URL": os.environ["BENCH_SPLASH"],
+            "SPLASH_URLS": [os.environ["BENCH_SPLASH"]],
+            # лимит рендеров — на слот локальной подмены, как DOWNLOAD_SLOTS в books.settings
+            "DOWNLOAD_SLOTS": {
+                "splash:" + urlsplit(os.environ["BENCH_SPLASH"]).netloc:
+                    {"concurrency": settings.getint("SPLASH_POOL_MAX_INFLIGHT")},
+            },
+            "LABIRINT_MAX_PAGES": 0,
+        }
+
+    overrides.update({
+        "TWISTED_REACTOR": "twisted.internet.asyncioreactor.AsyncioSelectorReactor",
+        "ROBOTSTXT_OBEY": False,
+        "HTTPCACHE_ENABLED": False,
+        "TELNETCONSOLE_ENABLED": False,
+        "LOG_LEVEL": args.log_level,
+        "CLOSESPIDER_TIMEOUT": args.timeout,
+        "DOWNLOADER_MIDDLEWARES": _merged(
+            settings, spidercls, "DOWNLOADER_MIDDLEWARES", {"bench.crawl.LocalSiteMiddleware": 950}
+        ),
+        "EXTENSIONS": _merged(settings, spidercls, "EXTENSIONS", {"bench.crawl.BenchProbe": 0}),
+    })
+    for key, value in overrides.items():
+        settings.set(key, value, priority="cmdline")
+
+    process = CrawlerProcess(settings, install_root_handler=args.log_level != "CRITICAL")
+    crawler = process.create_crawler(spidercls)
+    process.crawl(crawler)
+    process.start()
+    return crawler.stats.get_value("item_scraped_count", 0), BenchProbe.latencies
+
+
+# --- lab3 ---
+
+def run_news(args) -> tuple[int, list[float]]:
+    sys.path.insert(0, str(ROOT / "lab3"))
+    import scrape_news_mongo as lab3
+    from frontier import CrawlFrontier
+    from mongo_utils import get_collection, get_frontier_collection
+    from sources import SOURCES
+
+    lab3.BASE_URL = json.loads(os.environ["BENCH_HOSTS"])["lenta.ru"]
+    if args.news_rate:
+        lab3.rate_limiter = lab3.HostRateLimiter(rate=args.news_rate, burst=args.news_rate)
+
+    latencies = []
+    fetch_one = lab3._published_at_or_error
+
+    def timed(source, link):
+        started = time.monotonic()
+        try:
+            return fetch_one(source, link)
+        finally:
+            latencies.append(time.monotonic() - started)
+
+    lab3._published_at_or_error = timed
+
+    uri = os.environ["NEWS_MONGO_URI"]
+    col = get_collection(uri, NEWS_DB)
+    source = SOURCES[lab3.SOURCE_NAME]
+    frontier = CrawlFrontier(get_frontier_collection(uri, NEWS_DB, source.frontier_collection))
+    # crawl_articles печатает каждую статью — в бенче это шум
+    with contextlib.redirect_stdout(io.StringIO()):
+        inserted = source.crawl(col, frontier)["inserted"]
+    return inserted, latencies
+
+
+def prepare_mongo(mongo: str) -> str:
+    import common.mongo
+
+    if mongo == "memory":
+        try:
+            import mongomock
+        except ImportError:
+            raise SystemExit("--mongo memory needs mongomock: pip install mongomock")
+        common.mongo.MongoClient = lambda uri, **kw: mongomock.MongoClient()
+        return MEMORY_URI
+    client = common.mongo.get_client(mongo)
+    for db in (NEWS_DB, CRAWL_DB):
+        client.drop_database(db)
+    return mongo
+
+
+def worker(name: str, args) -> dict:
+    uri = prepare_mongo(args.mongo)
+    # mvideo_main и пайплайн книг читают окружение при импорте/создании
+    os.environ.update({
+        "NEWS_MONGO_URI": uri, "MONGO_URI": uri, "MONGO_DB": CRAWL_DB,
+        "NEWS_HTTP_CACHE": "", "LABIRINT_HTTPCACHE": "0",
+    })
+
+    before = resource.getrusage(resource.RUSAGE_SELF)
+    started = time.perf_counter()
+    items, latencies = run_news(args) if name == "news" else run_scrapy(name, args)
+    elapsed = time.perf_counter() - started
+    after = resource.getrusage(resource.RUSAGE_SELF)
+
+    cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    return {
+        "items": items,
+        "elapsed_s": elapsed,
+        "items_per_s": items / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50) * 1000,
+            "p99": percentile(latencies, 0.99) * 1000,
+        },
+        "cpu_s": cpu,
+        "cpu_util": cpu / elapsed if elapsed else 0.0,
+        # ru_maxrss в Linux — КиБ
+        "max_rss_mb": after.ru_maxrss / 1024,
+    }
+
+
+# --- оркестратор ---
+
+def run_one(name: str, sites: LocalSites, args) -> dict:
+    before = sites.counters()
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as tmp:
+        result_path = tmp.name
+    env = dict(
+        os.environ,
+        BENCH_HOSTS=json.dumps(sites.host_map()),
+        BENCH_SPLASH=sites.splash.url.rstrip("/"),
+        # весь фронтир статей — за один прогон
+        NEWS_ARTICLES_PER_RUN=str(args.articles),
+    )
+    cmd = [
+        sys.executable, "-m", "bench.crawl", "--worker", name, "--result", result_path,
+        "--mongo", args.mongo, "--timeout", str(args.timeout), "--log-level", args.log_level,
+        "--news-rate", str(args.news_rate),
+    ]
+    try:
+        proc = subprocess.run(cmd, cwd=ROOT, env=env)
+        if proc.returncode != 0:
+            return {"error": f"worker exited with {proc.returncode}"}
+        result = json.loads(Path(result_path).read_text())
+    finally:
+        Path(result_path).unlink(missing_ok=True)
+
+    after = sites.counters()
+    result["server"] = {
+        host: {k: after[host][k] - before[host][k] for k in after[host]}
+        for host in after
+        if after[host]["requests"] != before[host]["requests"]
+    }
+    return result
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="End-to-end crawl benchmark against local site stand-ins")
+    ap.add_argument("scrapers", nargs="*", help=f"из {list(SCRAPERS)}; по умолчанию все")
+    ap.add_argument("--mongo", default=os.getenv("BENCH_MONGO_URI", "mongodb://localhost:27017"),
+                    help="URI mongod или memory (mongomock)")
+    ap.add_argument("--latency-ms", type=float, default=50)
+    ap.add_argument("--jitter-ms", type=float, default=20)
+    ap.add_argument("--render-ms", type=float, default=500, help="время «рендера» Splash-подмены")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="доля ответов 503")
+    ap.add_argument("--articles", type=int, default=200, help="статей в ленте lenta")
+    ap.add_argument("--products", type=int, default=30, help="товаров в блоке «В тренде»")
+    ap.add_argument("--pages", type=int, default=5, help="страниц рейтинга labirint")
+    ap.add_argument("--books-per-page", type=int, default=20)
+    ap.add_argument("--news-rate", type=float, default=0.0,
+                    help="req/s на хост для lab3 (0 — как в скрапере)")
+    ap.add_argument("--timeout", type=int, default=600, help="CLOSESPIDER_TIMEOUT, сек")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--log-level", default="WARNING")
+    ap.add_argument("--out", default="bench_crawl.json")
+    # внутренний режим: один скрапер в отдельном процессе
+    ap.add_argument("--worker", choices=SCRAPERS, help=argparse.SUPPRESS)
+    ap.add_argument("--result", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.worker:
+        Path(args.result).write_text(json.dumps(worker(args.worker, args)))
+        return 0
+
+    unknown = [s for s in args.scrapers if s not in SCRAPERS]
+    if unknown:
+        ap.error(f"unknown scrapers: {unknown}")
+
+    sites = LocalSites(
+        latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate, render_latency=args.render_ms / 1000,
+        articles=args.articles, products=args.products,
+        pages=args.pages, books_per_page=args.books_per_page, seed=args.seed,
+    ).start()
+    results = {}
+    try:
+        for name in args.scrapers or SCRAPERS:
+            res = results[name] = run_one(name, sites, args)
+            if "error" in res:
+                print(f"{name:10s} FAILED: {res['error']}")
+                continue
+            lat = res["latency_ms"]
+            print(
+                f"{name:10s} {res['items']:6d} items  {res['items_per_s']:8.1f} items/s  "
+                f"p50={lat['p50']:.0f}ms p99={lat['p99']:.0f}ms  "
+                f"cpu={res['cpu_s']:.1f}s ({res['cpu_util']:.0%})  rss={res['max_rss_mb']:.0f}MiB"
+            )
+    finally:
+        sites.stop()
+
+    Path(args.out).write_text(json.dumps({"config": vars(args), "results": results}, indent=2, ensure_ascii=False))
+    print(f"\nResults: {args.out}")
+    return 0 if all("error" not in r for r in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
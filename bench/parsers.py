@@ -0,0 +1,204 @@
+# bench/parsers.py
+"""
+Офлайн-бенчмарк функций извлечения всех трёх скраперов на сохранённых страницах.
+
+Корпус: bench/fixtures/<набор>/*.html (lenta_main, lenta_article,
+mvideo_product, labirint_book) — туда кладём записанные страницы
+(python -m bench.record). sample.html в каждом наборе — маленькая
+рукописная страница для проверки, что бенчмарк вообще запускается:
+на ней не видно затрат, растущих с размером документа (//*[contains(., ...)]),
+поэтому для сравнения прогонов нужен корпус из нескольких настоящих страниц.
+
+Запуск из корня репозитория:
+    python -m bench.parsers --out bench_results.json
+    python -m bench.parsers --baseline bench_baseline.json --tolerance 0.2
+
+Для каждой функции печатаем pages/s, p50/p90/p99 latency и пиковую память
+(tracemalloc), результаты пишем в JSON. С --baseline сравниваем p50 и
+throughput с сохранённым прогоном и падаем (exit 1), если стало хуже допуска.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+# без дискового http-кэша: импорт scrape_news_mongo не должен создавать файлов
+os.environ.setdefault("NEWS_HTTP_CACHE", "")
+for lab in ("lab3", "lab5", "lab6"):
+    sys.path.insert(0, str(ROOT / lab))
+
+
+def load_pages(name: str) -> list[tuple[str, bytes]]:
+    return [(p.name, p.read_bytes()) for p in sorted((FIXTURES / name).glob("*.html"))]
+
+
+def html_response(url: str, body: bytes):
+    from scrapy.http import HtmlResponse
+
+    return HtmlResponse(url=url, body=body, encoding="utf-8")
+
+
+def build_cases() -> list[tuple[str, str, callable]]:
+    """
+    (имя, набор фикстур, функция от (url, body)) для каждой функции извлечения.
+    Подготовка входа (decode, HtmlResponse) делается в обёртке — как в реальном коде.
+    """
+    import scrape_news_mongo as lab3
+    import mvideo_main as lab5
+    from books.spiders import labirint_spider as lab6
+
+    from scrapy.statscollectors import MemoryStatsCollector
+    from scrapy.utils.test import get_crawler
+
+    # parse_book пишет в crawler.stats, поэтому спайдер нужен с краулером
+    crawler = get_crawler(lab6.LabirintBooksSpider)
+    spider = lab6.LabirintBooksSpider.from_crawler(crawler)
+    if getattr(crawler, "stats", None) is None:
+        crawler.stats = MemoryStatsCollector(crawler)
+
+    def book_text(body: bytes) -> str:
+        return html_response("https://www.labirint.ru/books/1/", body).xpath("normalize-space(//body)").get()
+
+    return [
+        ("lab3.extract_mainpage_items", "lenta_main",
+         lambda url, body: lab3.extract_mainpage_items(body.decode("utf-8"))),
+        ("lab3.extract_published_at", "lenta_article",
+         lambda url, body: lab3.extract_published_at(body.decode("utf-8"))),
+        ("lab5.extract_prices_from_html", "mvideo_product",
+         lambda url, body: lab5.extract_prices_from_html(body.decode("utf-8"))),
+        ("lab5.extract_product_prices", "mvideo_product",
+         lambda url, body: lab5.extract_product_prices(
+             html_response(url, body).selector.root, body.decode("utf-8"))),
+        ("lab6.extract_prices", "labirint_book",
+         lambda url, body: lab6.extract_prices(book_text(body))),
+        ("lab6.extract_rating", "labirint_book",
+         lambda url, body: lab6.extract_rating(book_text(body))),
+        ("lab6.LabirintBooksSpider.parse_book", "labirint_book",
+         lambda url, body: list(spider.parse_book(html_response(url, body)))),
+    ]
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = (len(values) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def run_case(func, pages: list[tuple[str, bytes]], iterations: int) -> dict:
+    url = "https://example.invalid/page"
+    for _, body in pages:  # прогрев
+        func(url, body)
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for _, body in pages:
+            t0 = time.perf_counter()
+            func(url, body)
+            latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    # память — отдельным проходом, tracemalloc сильно замедляет вызовы
+    tracemalloc.start()
+    for _, body in pages:
+        func(url, body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "pages": len(latencies),
+        "pages_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "mean": statistics.fmean(latencies) * 1000,
+            "p50": percentile(latencies, 0.50) * 1000,
+            "p90": percentile(latencies, 0.90) * 1000,
+            "p99": percentile(latencies, 0.99) * 1000,
+        },
+        "peak_mem_kb": peak / 1024,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, cur in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if cur["latency_ms"]["p50"] > base["latency_ms"]["p50"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p50 {cur['latency_ms']['p50']:.3f}ms > baseline {base['latency_ms']['p50']:.3f}ms"
+            )
+        if cur["pages_per_s"] < base["pages_per_s"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: {cur['pages_per_s']:.1f} pages/s < baseline {base['pages_per_s']:.1f} pages/s"
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Parser micro-benchmarks over recorded HTML fixtures")
+    ap.add_argument("--iterations", type=int, default=200)
+    ap.add_argument("--only", help="запускать только функции, в имени которых есть подстрока")
+    ap.add_argument("--out", default="bench_results.json")
+    ap.add_argument("--baseline", help="JSON предыдущего прогона для сравнения")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="допустимое ухудшение (0.2 = 20%%)")
+    ap.add_argument("--min-pages", type=int, default=3,
+                    help="меньше страниц в наборе — предупреждение (с --baseline — ошибка)")
+    args = ap.parse_args(argv)
+
+    results = {}
+    thin = set()
+    for name, fixture_set, func in build_cases():
+        if args.only and args.only not in name:
+            continue
+        pages = load_pages(fixture_set)
+        if not pages:
+            print(f"{name}: no fixtures in {FIXTURES / fixture_set}, skipped")
+            continue
+        if len(pages) < args.min_pages:
+            thin.add(fixture_set)
+        res = run_case(func, pages, args.iterations)
+        results[name] = res
+        lat = res["latency_ms"]
+        print(
+            f"{name:40s} {res['pages_per_s']:10.1f} pages/s  "
+            f"p50={lat['p50']:.3f}ms p90={lat['p90']:.3f}ms p99={lat['p99']:.3f}ms  "
+            f"peak={res['peak_mem_kb']:.0f}KiB"
+        )
+
+    Path(args.out).write_text(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f"\nResults: {args.out}")
+
+    for fixture_set in sorted(thin):
+        print(
+            f"WARNING: {fixture_set} has fewer than {args.min_pages} pages — "
+            f"record real ones: python -m bench.record {fixture_set}"
+        )
+    if args.baseline and thin:
+        print("Refusing to compare against a baseline on a thin corpus.")
+        return 1
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nREGRESSIONS:")
+            for r in regressions:
+                print(f" - {r}")
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
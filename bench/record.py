@@ -0,0 +1,87 @@
+# bench/record.py
+"""
+Запись реальных страниц в корпус bench/fixtures/<набор>/ для bench.parsers.
+
+    python -m bench.record lenta_main                      -> главная lenta.ru
+    python -m bench.record lenta_article --count 10        -> 10 статей со свежей главной
+    python -m bench.record labirint_book --count 10        -> 10 книг из рейтинга
+    python -m bench.record mvideo_product URL [URL ...]    -> карточки по явным URL
+
+Ссылки для lenta_article и labirint_book берутся со страницы-индекса
+(главная / рейтинг). У mvideo список товаров строится JS-ом, поэтому
+карточки передаём явно. Страницы сохраняются как есть (байты ответа).
+"""
+import argparse
+import hashlib
+import sys
+import time
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from lxml import html
+
+from bench.parsers import FIXTURES
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; NewsParserHomework/1.0)"}
+
+# набор -> (страница-индекс, xpath ссылок на страницы набора); None — индекс сам и есть страница
+SETS = {
+    "lenta_main": ("https://lenta.ru/", None),
+    "lenta_article": ("https://lenta.ru/", '//a[contains(@href, "/news/20")]/@href'),
+    "labirint_book": ("https://www.labirint.ru/rating/", '//a[contains(@href, "/books/")]/@href'),
+    "mvideo_product": (None, None),
+}
+
+
+def discover(session: requests.Session, index: str, xpath: str, count: int) -> list[str]:
+    r = session.get(index, timeout=30)
+    r.raise_for_status()
+    hrefs = html.fromstring(r.content).xpath(xpath)
+    return list(dict.fromkeys(urljoin(index, h) for h in hrefs))[:count]
+
+
+def file_name(url: str) -> str:
+    path = urlsplit(url).path.strip("/").replace("/", "_") or "index"
+    return f"{path[:80]}_{hashlib.sha1(url.encode('utf-8')).hexdigest()[:8]}.html"
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Record real pages into the bench fixture corpus")
+    ap.add_argument("set", choices=sorted(SETS))
+    ap.add_argument("urls", nargs="*", help="явные URL (иначе — ссылки со страницы-индекса)")
+    ap.add_argument("--count", type=int, default=10)
+    ap.add_argument("--delay", type=float, default=1.0, help="пауза между запросами, сек")
+    args = ap.parse_args(argv)
+
+    session = requests.Session()
+    session.headers.update(HEADERS)
+
+    index, xpath = SETS[args.set]
+    urls = args.urls
+    if not urls:
+        if index is None:
+            ap.error(f"{args.set}: pass product URLs explicitly")
+        urls = [index] if xpath is None else discover(session, index, xpath, args.count)
+
+    out_dir = FIXTURES / args.set
+    out_dir.mkdir(parents=True, exist_ok=True)
+    saved = 0
+    for url in urls:
+        try:
+            r = session.get(url, timeout=30)
+            r.raise_for_status()
+        except requests.RequestException as e:
+            print(f"skip {url}: {e!r}")
+            continue
+        path = out_dir / file_name(url)
+        path.write_bytes(r.content)
+        saved += 1
+        print(f"{len(r.content) // 1024:6d} KiB  {path.name}")
+        time.sleep(args.delay)
+
+    print(f"Saved {saved} page(s) to {out_dir}")
+    return 0 if saved else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,310 @@
+# bench/site.py
+"""
+Локальная подмена lenta.ru, mvideo.ru, labirint.ru и Splash для офлайн-прогонов.
+
+Каждый сайт — свой HTTP-сервер на 127.0.0.1 (у lenta ссылки относительные,
+поэтому один хост = один порт). Ленты/рейтинг/главная генерируются,
+карточки отдаются из записанных страниц bench/fixtures/*. Настраиваются
+задержка ответа (+ разброс), доля 503 и число страниц.
+
+SplashStandIn отвечает на /render.html (GET с ?url= или POST JSON, как шлёт
+scrapy-splash): ждёт render_latency и отдаёт страницу нужного сайта по
+хосту и пути из url.
+
+    python -m bench.site --latency-ms 50 --error-rate 0.02   -> поднять и ждать Ctrl+C
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+# карточки у всех прогонов одинаковые — датой из ленты не управляем
+ARTICLE_DATE = "2026/01/01"
+
+
+def load_fixture(name: str) -> bytes:
+    pages = sorted((FIXTURES / name).glob("*.html"))
+    if not pages:
+        raise SystemExit(f"no fixtures in {FIXTURES / name}")
+    return pages[0].read_bytes()
+
+
+def _html(body: str) -> bytes:
+    return f'<!doctype html><html><head><meta charset="utf-8"></head><body>{body}</body></html>'.encode("utf-8")
+
+
+class Site(ABC):
+    """Один «сайт»: route(path, query) -> тело страницы или None (404)."""
+
+    host = ""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.bytes = 0
+        self.server: ThreadingHTTPServer | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @abstractmethod
+    def route(self, path: str, query: dict) -> bytes | None:
+        ...
+
+    def delay_and_fail(self) -> tuple[float, bool]:
+        with self.lock:
+            self.requests += 1
+            delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+            failed = self.rng.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        return delay, failed
+
+    def counters(self) -> dict:
+        with self.lock:
+            return {"requests": self.requests, "errors": self.errors, "bytes": self.bytes}
+
+    def start(self, port: int = 0) -> "Site":
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # keep-alive: клиенты скраперов держат соединения
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                site.handle(self)
+
+            def do_POST(self):
+                site.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def read_body(self, handler) -> bytes:
+        length = int(handler.headers.get("Content-Length") or 0)
+        return handler.rfile.read(length) if length else b""
+
+    def respond(self, handler, status: int, body: bytes) -> None:
+        handler.send_response(status)
+        handler.send_header("Content-Type", "text/html; charset=utf-8")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+        with self.lock:
+            self.bytes += len(body)
+
+    def handle(self, handler) -> None:
+        self.read_body(handler)
+        delay, failed = self.delay_and_fail()
+        if delay:
+            time.sleep(delay)
+        if failed:
+            self.respond(handler, 503, _html("Service Unavailable"))
+            return
+        parts = urlsplit(handler.path)
+        body = self.route(parts.path, parse_qs(parts.query))
+        if body is None:
+            self.respond(handler, 404, _html("Not Found"))
+        else:
+            self.respond(handler, 200, body)
+
+
+class LentaSite(Site):
+    """Главная и архивы /news/YYYY/MM/DD/ — одна и та же лента из articles статей."""
+
+    host = "lenta.ru"
+
+    def __init__(self, articles: int = 200, **kw):
+        super().__init__(**kw)
+        self.article = load_fixture("lenta_article")
+        links = "".join(
+            f'<a href="/news/{ARTICLE_DATE}/bench-{i}/">Новость номер {i}</a>' for i in range(articles)
+        )
+        self.listing = _html(f"<main>{links}</main>")
+
+    def route(self, path, query):
+        segments = [s for s in path.split("/") if s]
+        if not segments or (segments[0] == "news" and len(segments) == 4):
+            return self.listing
+        if segments[0] == "news" and len(segments) == 5:
+            return self.article
+        return None
+
+
+class MvideoSite(Site):
+    """Главная с блоком «В тренде» и карточки /products/...-<id>."""
+
+    host = "www.mvideo.ru"
+
+    def __init__(self, products: int = 30, **kw):
+        super().__init__(**kw)
+        self.product = load_fixture("mvideo_product")
+        links = "".join(
+            f'<a href="/products/bench-product-{100000 + i}">Товар {i}</a>' for i in range(products)
+        )
+        self.home = _html(f'<div class="trending"><h2>В тренде</h2>{links}</div>')
+
+    def route(self, path, query):
+        if path == "/":
+            return self.home
+        if path.startswith("/products/"):
+            return self.product
+        return None
+
+
+class LabirintSite(Site):
+    """Рейтинг /rating/?page=N (books_per_page книг, rel=next до pages) и карточки /books/<id>/."""
+
+    host = "www.labirint.ru"
+
+    def __init__(self, pages: int = 5, books_per_page: int = 20, **kw):
+        super().__init__(**kw)
+        self.pages = pages
+        self.books_per_page = books_per_page
+        self.book = load_fixture("labirint_book")
+
+    def route(self, path, query):
+        if path.rstrip("/") == "/rating":
+            page = int(query.get("page", ["1"])[0])
+            if page > self.pages:
+                return _html("<main></main>")
+            first = (page - 1) * self.books_per_page
+            links = "".join(
+                f'<a href="/books/{n}/">Книга {n}</a>' for n in range(first, first + self.books_per_page)
+            )
+            nxt = f'<a rel="next" href="/rating/?page={page + 1}">дальше</a>' if page < self.pages else ""
+            return _html(f"<main>{links}</main>{nxt}")
+        if path.startswith("/books/"):
+            return self.book
+        return None
+
+
+class SplashStandIn(Site):
+    """/render.html: страница сайта по url из аргументов, после render_latency."""
+
+    def __init__(self, sites: dict[str, Site], render_latency: float = 0.5, **kw):
+        super().__init__(**kw)
+        self.sites = sites
+        self.render_latency = render_latency
+
+    def handle(self, handler) -> None:
+        raw = self.read_body(handler)
+        parts = urlsplit(handler.path)
+        if parts.path != "/render.html":
+            self.respond(handler, 404, _html("Not Found"))
+            return
+        args = json.loads(raw) if raw else {k: v[0] for k, v in parse_qs(parts.query).items()}
+
+        delay, failed = self.delay_and_fail()
+        time.sleep(delay + self.render_latency)
+        if failed:
+            self.respond(handler, 503, _html("Splash overloaded"))
+            return
+        if urlsplit(args.get("url", "")).netloc not in self.sites:
+            self.respond(handler, 502, _html("unknown host"))
+            return
+        self.respond(handler, 200, self.route(parts.path, args))
+
+    def route(self, path, query):
+        """query — аргументы рендера (url, ...); хост url должен быть в sites."""
+        target = urlsplit(query["url"])
+        body = self.sites[target.netloc].route(target.path or "/", parse_qs(target.query))
+        # как render.html по умолчанию: 404 сайта отдаётся отрендеренной страницей с кодом 200
+        return body if body is not None else _html("Not Found")
+
+
+class LocalSites:
+    """Все подмены разом: sites[host] — сайт, splash — рендер, host_map() — host -> локальный URL."""
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        jitter: float = 0.02,
+        error_rate: float = 0.0,
+        render_latency: float = 0.5,
+        articles: int = 200,
+        products: int = 30,
+        pages: int = 5,
+        books_per_page: int = 20,
+        seed: int = 0,
+    ):
+        kw = {"latency": latency, "jitter": jitter, "error_rate": error_rate, "seed": seed}
+        self.sites = {
+            s.host: s
+            for s in (
+                LentaSite(articles=articles, **kw),
+                MvideoSite(products=products, **kw),
+                LabirintSite(pages=pages, books_per_page=books_per_page, **kw),
+            )
+        }
+        # у рендера своя задержка; ошибки — те же, что у сайтов
+        self.splash = SplashStandIn(self.sites, render_latency=render_latency, error_rate=error_rate, seed=seed)
+
+    def start(self) -> "LocalSites":
+        for site in self.sites.values():
+            site.start()
+        self.splash.start()
+        return self
+
+    def stop(self) -> None:
+        for site in self.sites.values():
+            site.stop()
+        self.splash.stop()
+
+    def host_map(self) -> dict[str, str]:
+        return {host: site.url for host, site in self.sites.items()}
+
+    def counters(self) -> dict[str, dict]:
+        out = {host: site.counters() for host, site in self.sites.items()}
+        out["splash"] = self.splash.counters()
+        return out
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="Serve recorded pages and a Splash stand-in locally")
+    ap.add_argument("--latency-ms", type=float, default=50)
+    ap.add_argument("--jitter-ms", type=float, default=20)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--render-ms", type=float, default=500)
+    args = ap.parse_args(argv)
+
+    sites = LocalSites(
+        latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate, render_latency=args.render_ms / 1000,
+    ).start()
+    for host, url in sites.host_map().items():
+        print(f"{host:18s} {url}")
+    print(f"{'splash':18s} {sites.splash.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        sites.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+# common/export.py
+"""
+Потоковая выгрузка коллекций в Parquet или JSONL (zstd/gzip).
+
+    python -m common.export books --format parquet --out-dir export/
+    python -m common.export news --format jsonl --source lenta.ru --incremental
+    python -m common.export mvideo --since 2025-12-01 --until 2025-12-31
+
+Курсор идёт по индексу scraped_at с большим batch_size, документы пишутся
+пачками (Arrow record batch / строки JSONL) — память ограничена одной пачкой.
+С --incremental выгружается только то, что новее водяного знака (последний
+выгруженный scraped_at) из out-dir/.export_state.json, а верхняя граница —
+now - --lag: запись, начатая до выгрузки, может закоммититься со scraped_at
+меньше водяного знака, и $gt её бы уже не взял.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from bson import ObjectId, json_util
+from pymongo import ASCENDING
+
+from common.mongo import get_client
+from common.report import TARGETS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet — опционально
+    pa = None
+
+try:
+    import zstandard
+except ImportError:  # zstd — опционально
+    zstandard = None
+
+STATE_FILE = ".export_state.json"
+DEFAULT_LAG = 60  # сек: запас на запись, которая ещё в полёте у скрапера
+
+
+def arrow_schema(target: str):
+    """Явные схемы: типы не зависят от того, что попалось в первой пачке."""
+    s, i, f, b, ts = pa.string(), pa.int64(), pa.float64(), pa.bool_(), pa.timestamp("ms")
+    fields = {
+        "news": [
+            ("source", s), ("title", s), ("link", s), ("published_at", s),
+            ("scraped_at", s), ("scraped_ts", ts),
+        ],
+        "mvideo": [
+            ("source", s), ("collection", s), ("title", s), ("url", s), ("product_id", s),
+            ("price_current_rub", i), ("price_old_rub", i), ("price_source", s), ("rendered", b),
+            ("scraped_at", ts), ("last_seen", ts), ("project_tag", s),
+        ],
+        "books": [
+            ("source", s), ("url", s), ("title", s), ("authors", pa.list_(s)),
+            ("price_base", i), ("price_discount", i), ("rating", f),
+            ("scraped_at", ts), ("last_seen", ts), ("project_tag", s),
+        ],
+    }[target]
+    return pa.schema(fields)
+
+
+def _bound(dt: datetime, as_string: bool):
+    """Граница в формате scraped_at: ISO-строка (news) или naive UTC datetime."""
+    dt = dt.astimezone(timezone.utc)
+    return dt.isoformat() if as_string else dt.replace(tzinfo=None)
+
+
+def _parse_when(value: str | None, as_string: bool):
+    if not value:
+        return None
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return _bound(dt, as_string)
+
+
+def build_filter(target: dict, source=None, project_tag=None, since=None, until=None) -> dict:
+    flt = {}
+    if source:
+        flt["source"] = source
+    if project_tag:
+        flt["project_tag"] = project_tag
+    rng = {}
+    if since is not None:
+        rng["$gt"] = since
+    if until is not None:
+        rng["$lt"] = until
+    if rng:
+        flt["scraped_at"] = rng
+    return flt
+
+
+def _jsonable(doc: dict) -> dict:
+    return {k: (str(v) if isinstance(v, ObjectId) else v) for k, v in doc.items()}
+
+
+class JsonlWriter:
+    def __init__(self, path: Path, compression: str):
+        if compression == "zstd":
+            if zstandard is None:
+                raise SystemExit("zstandard is not installed: pip install zstandard (or --compression gzip)")
+            self._raw = open(path, "wb")
+            self._fh = zstandard.ZstdCompressor(level=6).stream_writer(self._raw)
+        elif compression == "gzip":
+            self._raw = None
+            self._fh = gzip.open(path, "wb")
+        else:
+            self._raw = None
+            self._fh = open(path, "wb")
+
+    def write(self, docs: list[dict]) -> None:
+        lines = [json.dumps(_jsonable(d), ensure_ascii=False, default=str) for d in docs]
+        self._fh.write(("\n".join(lines) + "\n").encode("utf-8"))
+
+    def close(self) -> None:
+        self._fh.close()
+        if self._raw is not None and not self._raw.closed:
+            self._raw.close()
+
+
+class ParquetWriter:
+    def __init__(self, path: Path, target: str, compression: str):
+        if pa is None:
+            raise SystemExit("pyarrow is not installed: pip install pyarrow (or --format jsonl)")
+        self.schema = arrow_schema(target)
+        self._w = pq.ParquetWriter(path, self.schema, compression=compression if compression != "none" else None)
+
+    def write(self, docs: list[dict]) -> None:
+        batch = pa.RecordBatch.from_pylist(
+            [{name: d.get(name) for name in self.schema.names} for d in docs], schema=self.schema
+        )
+        self._w.write_batch(batch)
+
+    def close(self) -> None:
+        self._w.close()
+
+
+def _state_key(target: str, source, project_tag) -> str:
+    return hashlib.sha1(json.dumps([target, source, project_tag]).encode("utf-8")).hexdigest()[:12]
+
+
+def load_watermark(out_dir: Path, key: str):
+    path = out_dir / STATE_FILE
+    if not path.exists():
+        return None
+    return json_util.loads(path.read_text()).get(key)
+
+
+def save_watermark(out_dir: Path, key: str, value) -> None:
+    path = out_dir / STATE_FILE
+    state = json_util.loads(path.read_text()) if path.exists() else {}
+    state[key] = value
+    path.write_text(json_util.dumps(state))
+
+
+def export(
+    name: str,
+    fmt: str,
+    out_dir: Path,
+    compression: str,
+    batch_size: int,
+    source=None,
+    project_tag=None,
+    since=None,
+    until=None,
+    incremental: bool = False,
+    lag: float = DEFAULT_LAG,
+) -> tuple[Path | None, int]:
+    target = TARGETS[name]
+    as_string = target["scraped_at_is_string"]
+    out_dir.mkdir(parents=True, exist_ok=True)
+    key = _state_key(name, source, project_tag)
+
+    since = _parse_when(since, as_string)
+    until = _parse_when(until, as_string)
+    if incremental:
+        watermark = load_watermark(out_dir, key)
+        if watermark is not None and (since is None or watermark > since):
+            since = watermark
+        # свежие документы не берём: водяной знак не должен обогнать незакоммиченные записи
+        cutoff = _bound(datetime.now(timezone.utc) - timedelta(seconds=lag), as_string)
+        if until is None or cutoff < until:
+            until = cutoff
+
+    col = get_client(target["uri"])[target["db"]][target["collection"]]
+    flt = build_filter(target, source, project_tag, since, until)
+    cursor = (
+        col.find(flt, {"_id": 0})
+        .sort("scraped_at", ASCENDING)  # по idx_scraped_at / scraped_at_1
+        .batch_size(batch_size)
+    )
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    if fmt == "parquet":
+        path = out_dir / f"{name}_{stamp}.parquet"
+        writer = ParquetWriter(path, name, compression)
+    else:
+        ext = {"zstd": ".zst", "gzip": ".gz"}.get(compression, "")
+        path = out_dir / f"{name}_{stamp}.jsonl{ext}"
+        writer = JsonlWriter(path, compression)
+
+    total, last, buf = 0, None, []
+    try:
+        for doc in cursor:
+            buf.append(doc)
+            if len(buf) >= batch_size:
+                writer.write(buf)
+                total += len(buf)
+                last = buf[-1].get("scraped_at")
+                buf = []
+        if buf:
+            writer.write(buf)
+            total += len(buf)
+            last = buf[-1].get("scraped_at")
+    finally:
+        writer.close()
+
+    if total == 0:
+        path.unlink(missing_ok=True)
+        return None, 0
+    if incremental and last is not None:
+        save_watermark(out_dir, key, last)
+    return path, total
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="Stream a scraped collection to Parquet/JSONL")
+    ap.add_argument("target", choices=sorted(TARGETS))
+    ap.add_argument("--format", choices=["parquet", "jsonl"], default="parquet")
+    ap.add_argument("--compression", choices=["zstd", "gzip", "none"], default="zstd")
+    ap.add_argument("--out-dir", default=os.getenv("EXPORT_DIR", "export"))
+    ap.add_argument("--batch-size", type=int, default=5000)
+    ap.add_argument("--source")
+    ap.add_argument("--project-tag")
+    ap.add_argument("--since", help="ISO-дата/время, scraped_at > since")
+    ap.add_argument("--until", help="ISO-дата/время, scraped_at < until")
+    ap.add_argument("--incremental", action="store_true", help="продолжить с последнего выгруженного scraped_at")
+    ap.add_argument("--lag", type=float, default=DEFAULT_LAG,
+                    help="с --incremental: не выгружать документы свежее now - lag, сек")
+    args = ap.parse_args(argv)
+
+    path, total = export(
+        args.target, args.format, Path(args.out_dir), args.compression, args.batch_size,
+        source=args.source, project_tag=args.project_tag,
+        since=args.since, until=args.until, incremental=args.incremental, lag=args.lag,
+    )
+    if path is None:
+        print("Nothing new to export.")
+    else:
+        print(f"Exported {total} docs to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# common/extract.py
+"""
+Декларативное извлечение полей на заранее скомпилированных lxml.etree.XPath.
+
+Field — поле с упорядоченной цепочкой селекторов: пробуем по очереди,
+первый непустой (и прошедший accept) результат побеждает. Для каждого
+селектора копим статистику: сколько раз он сработал, сколько промахнулся
+и сколько времени занял. По ней видно мёртвые fallback-и и какой
+селектор стоит поставить первым.
+
+Работает и с lxml-деревьями (html.fromstring), и со Scrapy-ответами:
+для них передаём response.selector.root.
+"""
+import threading
+import time
+from typing import Any, Callable
+
+from lxml import etree
+
+from common.metrics import metrics
+
+_lock = threading.Lock()
+# поле -> метка селектора -> {"hits", "misses", "time"}
+_stats: dict[str, dict[str, dict[str, float]]] = {}
+
+
+def _is_empty(value: Any) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return not value.strip()
+    if isinstance(value, list):
+        return not value
+    return False
+
+
+class Field:
+    def __init__(
+        self,
+        name: str,
+        selectors: list[tuple[str, str]],
+        accept: Callable[[Any], bool] | None = None,
+    ):
+        """
+        selectors — [(метка, xpath)], xpath компилируется один раз здесь.
+        accept — дополнительная проверка результата (например, что дата парсится).
+        """
+        self.name = name
+        self.accept = accept
+        self.selectors = [(label, etree.XPath(expr)) for label, expr in selectors]
+        with _lock:
+            field_stats = _stats.setdefault(name, {})
+            for label, _ in self.selectors:
+                field_stats.setdefault(label, {"hits": 0, "misses": 0, "time": 0.0})
+
+    def _record(self, label: str, hit: bool, elapsed: float) -> None:
+        with _lock:
+            s = _stats[self.name][label]
+            s["hits" if hit else "misses"] += 1
+            s["time"] += elapsed
+
+    def extract_labeled(self, root, default: Any = None) -> tuple[str | None, Any]:
+        """(метка сработавшего селектора, значение); (None, default) если не сработал ни один."""
+        for i, (label, xpath) in enumerate(self.selectors):
+            started = time.perf_counter()
+            value = xpath(root)
+            if isinstance(value, str):
+                value = value.strip()
+            ok = not _is_empty(value) and (self.accept is None or self.accept(value))
+            self._record(label, ok, time.perf_counter() - started)
+            if ok:
+                if i:
+                    metrics.inc("selector_fallbacks_total", field=self.name, selector=label)
+                return label, value
+        metrics.inc("selector_misses_total", field=self.name)
+        return None, default
+
+    def extract(self, root, default: Any = None) -> Any:
+        return self.extract_labeled(root, default)[1]
+
+
+def stats_snapshot() -> dict[str, dict[str, dict[str, float]]]:
+    with _lock:
+        return {f: {label: dict(s) for label, s in sel.items()} for f, sel in _stats.items()}
+
+
+def format_stats() -> str:
+    lines = []
+    for field, selectors in stats_snapshot().items():
+        for label, s in selectors.items():
+            calls = s["hits"] + s["misses"]
+            avg_ms = s["time"] / calls * 1000 if calls else 0.0
+            lines.append(
+                f"{field}.{label}: hits={s['hits']} misses={s['misses']} avg={avg_ms:.3f}ms"
+            )
+    return "\n".join(lines)
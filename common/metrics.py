@@ -0,0 +1,301 @@
+# common/metrics.py
+"""
+Поэтапные тайминги и счётчики для всех трёх скраперов.
+
+    SCRAPER_METRICS=1                      -> включить сбор (по умолчанию выключен)
+    SCRAPER_METRICS_PORT=9410              -> Prometheus text на http://:9410/metrics (+ /metrics.json)
+    SCRAPER_METRICS_JSON=metrics.json      -> JSON-снимок раз в SCRAPER_METRICS_INTERVAL сек и в конце
+
+Что пишется:
+    scraper_stage_seconds{scraper, stage}   гистограмма: fetch | render | parse | db_write
+    scraper_bytes_total{scraper}            байт скачано
+    scraper_retries_total{scraper}          повторные запросы
+    scraper_cache_hits_total{scraper, kind} ответы из кэша (fresh / revalidated / httpcache)
+    scraper_items_total{scraper}            собранные item-ы / новости
+    scraper_selector_fallbacks_total{field, selector}  сработал не первый селектор Field
+    scraper_selector_misses_total{field}    не сработал ни один селектор
+
+Выключенный сбор стоит одну проверку флага: timer() отдаёт общий nullcontext,
+inc()/observe() сразу возвращаются.
+
+Для Scrapy — расширение ScrapyMetrics (EXTENSIONS), оно снимает fetch/render,
+байты, ретраи и кэш с сигнала response_received. parse и db_write
+замеряют сами спайдеры и MongoPipeline-ы через metrics.timer().
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = "scraper_"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_NULL = nullcontext()
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # последний — +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float | None:
+        """Оценка квантиля по верхним границам бакетов (как histogram_quantile, без интерполяции)."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class _Timer:
+    __slots__ = ("registry", "name", "labels", "started")
+
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry._observe(self.name, self.labels, time.perf_counter() - self.started)
+        return False
+
+
+def _key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+class Registry:
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[tuple, float]] = {}
+        self._histograms: dict[str, dict[tuple, Histogram]] = {}
+        self._server = None
+        self._json_path = None
+        self._json_timer = None
+        self._json_interval = 0.0
+
+    # --- запись ---
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        if not self.enabled:
+            return
+        key = _key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        if not self.enabled:
+            return
+        self._observe(name, _key(labels), seconds)
+
+    def _observe(self, name: str, key: tuple, seconds: float) -> None:
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            h = series.get(key)
+            if h is None:
+                h = series[key] = Histogram()
+            h.observe(seconds)
+
+    def timer(self, name: str, **labels):
+        """with metrics.timer("stage_seconds", scraper="news", stage="fetch"): ..."""
+        if not self.enabled:
+            return _NULL
+        return _Timer(self, name, _key(labels))
+
+    # --- выдача ---
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(k), "value": v} for k, v in series.items()]
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: [
+                    {
+                        "labels": dict(k),
+                        "count": h.count,
+                        "sum": round(h.sum, 6),
+                        "p50": h.quantile(0.5),
+                        "p90": h.quantile(0.9),
+                        "p99": h.quantile(0.99),
+                    }
+                    for k, h in series.items()
+                ]
+                for name, series in self._histograms.items()
+            }
+        return {"ts": time.time(), "counters": counters, "histograms": histograms}
+
+    def render_prometheus(self) -> str:
+        def fmt(labels: tuple, extra: tuple = ()) -> str:
+            pairs = [f'{k}="{str(v)}"' for k, v in labels + extra]
+            return "{" + ",".join(pairs) + "}" if pairs else ""
+
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {PREFIX}{name} counter")
+                for k, v in series.items():
+                    lines.append(f"{PREFIX}{name}{fmt(k)} {v}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {PREFIX}{name} histogram")
+                for k, h in series.items():
+                    cumulative = 0
+                    for bound, n in zip(h.buckets + (float("inf"),), h.counts):
+                        cumulative += n
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{PREFIX}{name}_bucket{fmt(k, (('le', le),))} {cumulative}")
+                    lines.append(f"{PREFIX}{name}_sum{fmt(k)} {h.sum}")
+                    lines.append(f"{PREFIX}{name}_count{fmt(k)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def start_http_server(self, port: int, addr: str = "0.0.0.0") -> None:
+        if self._server is not None:
+            return
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, ctype = registry.render_prometheus().encode(), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body, ctype = json.dumps(registry.snapshot()).encode(), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((addr, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def write_json(self, path: str | None = None) -> None:
+        path = path or self._json_path
+        if not path:
+            return
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+
+    def start_json_snapshots(self, path: str, interval: float) -> None:
+        self._json_path = path
+        self._json_interval = interval
+        self._schedule_json()
+
+    def _schedule_json(self) -> None:
+        if self._json_interval <= 0:
+            return
+        self._json_timer = threading.Timer(self._json_interval, self._json_tick)
+        self._json_timer.daemon = True
+        self._json_timer.start()
+
+    def _json_tick(self) -> None:
+        self.write_json()
+        self._schedule_json()
+
+    def close(self) -> None:
+        """Последний JSON-снимок и остановка фоновых потоков. Можно звать повторно."""
+        if self._json_timer is not None:
+            self._json_timer.cancel()
+            self._json_timer = None
+            self._json_interval = 0.0
+        if self.enabled:
+            self.write_json()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+
+
+metrics = Registry(enabled=os.getenv("SCRAPER_METRICS", "0") == "1")
+
+
+def configure_from_env() -> Registry:
+    """Поднимаем выдачу по SCRAPER_METRICS_PORT / SCRAPER_METRICS_JSON (если сбор включён)."""
+    if not metrics.enabled:
+        return metrics
+    port = os.getenv("SCRAPER_METRICS_PORT")
+    if port:
+        metrics.start_http_server(int(port))
+    path = os.getenv("SCRAPER_METRICS_JSON")
+    if path:
+        metrics.start_json_snapshots(path, float(os.getenv("SCRAPER_METRICS_INTERVAL", "10")))
+    atexit.register(metrics.close)
+    return metrics
+
+
+class ScrapyMetrics:
+    """
+    Scrapy-расширение: EXTENSIONS = {"common.metrics.ScrapyMetrics": 0}.
+
+    response_received -> stage_seconds{stage=fetch|render} по download_latency,
+    bytes_total, retries_total (retry_times в meta), cache_hits_total (флаг cached
+    от HttpCacheMiddleware); item_scraped -> items_total. Метка scraper — имя спайдера.
+    """
+
+    def __init__(self, crawler):
+        from scrapy import signals
+        from scrapy.exceptions import NotConfigured
+
+        if not metrics.enabled:
+            raise NotConfigured
+        self.scraper = None
+        crawler.signals.connect(self.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(self.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(self.response_received, signal=signals.response_received)
+        crawler.signals.connect(self.item_scraped, signal=signals.item_scraped)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def spider_opened(self, spider):
+        self.scraper = spider.name
+        configure_from_env()
+
+    def spider_closed(self, spider):
+        metrics.close()
+
+    def response_received(self, response, request, spider):
+        meta = request.meta
+        if "cached" in response.flags:
+            metrics.inc("cache_hits_total", scraper=self.scraper, kind="httpcache")
+        else:
+            stage = "render" if ("splash" in meta or meta.get("playwright")) else "fetch"
+            latency = meta.get("download_latency")
+            if latency is not None:
+                metrics.observe("stage_seconds", latency, scraper=self.scraper, stage=stage)
+            metrics.inc("bytes_total", len(response.body), scraper=self.scraper)
+        if meta.get("retry_times"):
+            metrics.inc("retries_total", scraper=self.scraper)
+
+    def item_scraped(self, item, response, spider):
+        metrics.inc("items_total", scraper=self.scraper)
@@ -0,0 +1,167 @@
+# common/mongo.py
+"""
+Общий для всех лаб реестр MongoClient и описание индексов коллекций.
+
+- get_client(uri) — один клиент (со своим пулом соединений) на URI в процессе;
+- ensure_schema(col) — идемпотентно создаёт индексы из SCHEMAS, один раз на процесс.
+"""
+import atexit
+import os
+import threading
+
+from pymongo import MongoClient, ASCENDING
+from pymongo.collection import Collection
+from pymongo.database import Database
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+
+# Сроки хранения: схема -> (поле-дата, дней). Применяются TTL-индексами из SCHEMAS.
+# Поле обязано быть Date: у news это scraped_ts (scraped_at там ISO-строка),
+# у книг и mvideo scraped_at меняется только при изменении — "живость" в last_seen.
+RETENTION_POLICIES = {
+    "news": ("scraped_ts", int(os.getenv("NEWS_RETENTION_DAYS", "90"))),
+    "mvideo_trending": ("last_seen", int(os.getenv("MVIDEO_RETENTION_DAYS", "180"))),
+    "books_labirint": ("last_seen", int(os.getenv("BOOKS_RETENTION_DAYS", "180"))),
+}
+
+
+def _ttl(schema: str, name: str) -> tuple[list, dict]:
+    field, days = RETENTION_POLICIES[schema]
+    return [(field, ASCENDING)], {"name": name, "expireAfterSeconds": days * 24 * 3600}
+
+
+# Индексы всех коллекций в одном месте: имя коллекции -> [(keys, options)].
+# Имена индексов совпадают с тем, что создавалось раньше, иначе create_index упадёт.
+SCHEMAS: dict[str, list[tuple[list, dict]]] = {
+    "news": [
+        ([("link", ASCENDING)], {"unique": True, "name": "uniq_link"}),
+        ([("source", ASCENDING)], {"name": "idx_source"}),
+        ([("published_at", ASCENDING)], {"name": "idx_published_at"}),
+        ([("scraped_at", ASCENDING)], {"name": "idx_scraped_at"}),
+        _ttl("news", "ttl_scraped_ts"),
+    ],
+    # фронтир обхода lab3 (lab3/frontier.py)
+    "news_frontier": [
+        ([("url", ASCENDING)], {"unique": True, "name": "uniq_url"}),
+        # claim: по виду/состоянию, давно не обходившиеся (и ни разу не обходившиеся) — первыми
+        ([("kind", ASCENDING), ("state", ASCENDING), ("fetched_at", ASCENDING), ("last_seen", ASCENDING)],
+         {"name": "idx_kind_state_fetched_at"}),
+    ],
+    "mvideo_trending": [
+        ([("url", ASCENDING)], {"unique": True, "name": "url_1"}),
+        ([("product_id", ASCENDING)], {"name": "product_id_1"}),
+        ([("scraped_at", ASCENDING)], {"name": "scraped_at_1"}),
+        _ttl("mvideo_trending", "ttl_last_seen"),
+    ],
+    # история цен mvideo (time-series коллекция, см. ensure_timeseries)
+    "mvideo_price_history": [
+        ([("product_id", ASCENDING), ("ts", ASCENDING)], {"name": "idx_product_ts"}),
+    ],
+    "books_labirint": [
+        ([("url", ASCENDING)], {"unique": True, "name": "url_1"}),
+        ([("scraped_at", ASCENDING)], {"name": "idx_scraped_at"}),
+        _ttl("books_labirint", "ttl_last_seen"),
+    ],
+}
+
+_lock = threading.Lock()
+_clients: dict[str, MongoClient] = {}
+_ensured: set[tuple[str, str]] = set()
+
+
+def get_client(
+    mongo_uri: str,
+    max_pool_size: int = MONGO_MAX_POOL_SIZE,
+    min_pool_size: int = MONGO_MIN_POOL_SIZE,
+) -> MongoClient:
+    """
+    Клиент из реестра по URI. Размер пула задаётся при первом создании клиента.
+    """
+    with _lock:
+        client = _clients.get(mongo_uri)
+        if client is None:
+            client = MongoClient(
+                mongo_uri,
+                maxPoolSize=max_pool_size,
+                minPoolSize=min_pool_size,
+            )
+            _clients[mongo_uri] = client
+        return client
+
+
+def close_client(mongo_uri: str) -> None:
+    with _lock:
+        client = _clients.pop(mongo_uri, None)
+        _ensured.difference_update({k for k in _ensured if k[0] == mongo_uri})
+    if client is not None:
+        client.close()
+
+
+def close_all() -> None:
+    for uri in list(_clients):
+        close_client(uri)
+
+
+# клиенты живут до конца процесса: закрывать общий клиент из одного потребителя нельзя
+atexit.register(close_all)
+
+
+def _client_key(col: Collection) -> str:
+    for uri, client in _clients.items():
+        if client is col.database.client:
+            return uri
+    return str(id(col.database.client))
+
+
+def ensure_schema(col: Collection, schema: str | None = None, force: bool = False) -> None:
+    """
+    Создаём индексы коллекции по SCHEMAS (schema по умолчанию = имя коллекции).
+    Повторный вызов в том же процессе ничего не делает, если не передан force=True.
+    """
+    name = schema or col.name
+    key = (_client_key(col), col.full_name)
+    with _lock:
+        if key in _ensured and not force:
+            return
+
+    for keys, options in SCHEMAS.get(name, []):
+        try:
+            col.create_index(keys, **options)
+        except OperationFailure as e:
+            # 85/86: индекс уже есть с другими опциями
+            if e.code not in (85, 86):
+                raise
+            if "expireAfterSeconds" not in options:
+                # бывший TTL-индекс (например, scraped_at_1 у mvideo) — пересоздаём обычным
+                col.drop_index(options["name"])
+                col.create_index(keys, **options)
+                continue
+            # обычный индекс делаем TTL через collMod
+            col.database.command("collMod", col.name, index={
+                "keyPattern": dict(keys),
+                "expireAfterSeconds": options["expireAfterSeconds"],
+            })
+
+    with _lock:
+        _ensured.add(key)
+
+
+def ensure_timeseries(
+    db: Database,
+    name: str,
+    time_field: str,
+    meta_field: str,
+    granularity: str = "hours",
+) -> Collection:
+    """Создаём time-series коллекцию, если её ещё нет (идемпотентно)."""
+    if name not in db.list_collection_names(filter={"name": name}):
+        try:
+            db.create_collection(
+                name,
+                timeseries={"timeField": time_field, "metaField": meta_field, "granularity": granularity},
+            )
+        except CollectionInvalid:
+            pass  # создали параллельно
+    return db[name]
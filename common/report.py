@@ -0,0 +1,255 @@
+# common/report.py
+"""
+Отчёты по коллекциям всех лаб (вместо db_check-скриптов).
+
+Запуск из корня репозитория:
+    python -m common.report news                 -> сводка (размер, индексы, последние 10)
+    python -m common.report news sources         -> число документов по source
+    python -m common.report mvideo days --days 7 -> документы по дням
+    python -m common.report mvideo prices        -> изменения цен (история mvideo)
+    python -m common.report books prices --days 7 -> самые большие скидки среди книг, виденных за неделю
+    python -m common.report books advise         -> explain() всех запросов отчёта
+
+Размер — estimated_document_count (метаданные, без скана); остальное —
+запросы по индексам из common.mongo.SCHEMAS. advise показывает, какие
+запросы делают COLLSCAN / сортировку в памяти и каких индексов не хватает.
+"""
+import argparse
+import os
+from datetime import datetime, timedelta, timezone
+
+from pymongo import DESCENDING
+
+from common.mongo import SCHEMAS, get_client
+
+# цель отчёта -> где лежит коллекция и как устроены её поля
+TARGETS = {
+    "news": {
+        "uri": os.getenv("NEWS_MONGO_URI", "mongodb://localhost:27017"),
+        "db": os.getenv("NEWS_MONGO_DB", "news_db"),
+        "collection": "news",
+        "schema": "news",
+        # lab3 пишет scraped_at ISO-строкой
+        "scraped_at_is_string": True,
+        "columns": ["source", "title", "link", "published_at", "scraped_at"],
+    },
+    "mvideo": {
+        "uri": os.getenv("MONGO_URI", "mongodb://localhost:27017"),
+        "db": os.getenv("MONGO_DB", "parsing_hw"),
+        "collection": os.getenv("MONGO_COLLECTION_MVIDEO", "mvideo_trending"),
+        "schema": "mvideo_trending",
+        "history": os.getenv("MONGO_COLLECTION_MVIDEO_HISTORY", "mvideo_price_history"),
+        "scraped_at_is_string": False,
+        "columns": ["title", "url", "price_current_rub", "price_old_rub", "scraped_at"],
+    },
+    "books": {
+        "uri": os.getenv("MONGO_URI", "mongodb://localhost:27017"),
+        "db": os.getenv("MONGO_DB", "parsing_hw"),
+        "collection": os.getenv("MONGO_COLLECTION_BOOKS", "books_labirint"),
+        "schema": "books_labirint",
+        "scraped_at_is_string": False,
+        "columns": ["title", "authors", "price_base", "price_discount", "rating", "url", "scraped_at"],
+    },
+}
+
+
+def _since(target: dict, days: int):
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    return since.isoformat() if target["scraped_at_is_string"] else since.replace(tzinfo=None)
+
+
+# Запрос описываем данными: ("find", filter, projection, sort, limit),
+# ("count", filter) или ("aggregate", pipeline) — так его можно и выполнить, и explain-нуть.
+
+def q_last(target: dict, n: int = 10):
+    projection = {"_id": 0, **{c: 1 for c in target["columns"]}}
+    return ("find", {}, projection, [("scraped_at", DESCENDING)], n)
+
+
+def q_source_count(source: str):
+    return ("count", {"source": source})
+
+
+def q_days(target: dict, days: int):
+    day = (
+        {"$substrCP": ["$scraped_at", 0, 10]}
+        if target["scraped_at_is_string"]
+        else {"$dateToString": {"format": "%Y-%m-%d", "date": "$scraped_at"}}
+    )
+    return ("aggregate", [
+        {"$match": {"scraped_at": {"$gte": _since(target, days)}}},
+        {"$project": {"_id": 0, "day": day}},
+        {"$group": {"_id": "$day", "n": {"$sum": 1}}},
+        {"$sort": {"_id": 1}},
+    ])
+
+
+def q_price_deltas(target: dict, days: int, limit: int = 20):
+    # по истории: первая и последняя цена за окно, сортируем по величине изменения
+    return ("aggregate", [
+        {"$match": {"ts": {"$gte": _since(target, days)}}},
+        {"$sort": {"product_id": 1, "ts": 1}},
+        {"$group": {
+            "_id": "$product_id",
+            "url": {"$last": "$url"},
+            "first": {"$first": "$price_current_rub"},
+            "last": {"$last": "$price_current_rub"},
+            "points": {"$sum": 1},
+        }},
+        {"$match": {"first": {"$ne": None}, "last": {"$ne": None}}},
+        {"$addFields": {"delta": {"$subtract": ["$last", "$first"]}}},
+        {"$addFields": {"abs_delta": {"$abs": "$delta"}}},
+        {"$sort": {"abs_delta": -1}},
+        {"$limit": limit},
+    ])
+
+
+def q_book_discounts(target: dict, days: int, limit: int = 20):
+    # окно по last_seen (индекс ttl_last_seen): сортировка в памяти только по
+    # книгам, виденным за последние days дней, а не по всей коллекции
+    return ("aggregate", [
+        {"$match": {
+            "last_seen": {"$gte": _since(target, days)},
+            "price_base": {"$gt": 0},
+            "price_discount": {"$gt": 0},
+        }},
+        {"$project": {
+            "_id": 0, "title": 1, "url": 1, "price_base": 1, "price_discount": 1,
+            "delta": {"$subtract": ["$price_base", "$price_discount"]},
+        }},
+        {"$sort": {"delta": -1}},
+        {"$limit": limit},
+    ])
+
+
+def run(col, query):
+    kind = query[0]
+    if kind == "find":
+        _, flt, projection, sort, limit = query
+        return list(col.find(flt, projection).sort(sort).limit(limit))
+    if kind == "count":
+        return col.count_documents(query[1])
+    return list(col.aggregate(query[1]))
+
+
+def explain(col, query) -> dict:
+    db = col.database
+    kind = query[0]
+    if kind == "find":
+        _, flt, projection, sort, limit = query
+        cmd = {"find": col.name, "filter": flt, "projection": projection, "sort": dict(sort), "limit": limit}
+    elif kind == "count":
+        cmd = {"count": col.name, "query": query[1]}
+    else:
+        cmd = {"aggregate": col.name, "pipeline": query[1], "cursor": {}}
+    return db.command("explain", cmd, verbosity="queryPlanner")
+
+
+def plan_stages(node) -> list[str]:
+    """Все stage из winningPlan (включая вложенные inputStage/inputStages и $cursor)."""
+    stages = []
+    if isinstance(node, dict):
+        if "stage" in node:
+            stages.append(node["stage"])
+        for key, value in node.items():
+            if key in ("rejectedPlans",):
+                continue
+            stages.extend(plan_stages(value))
+    elif isinstance(node, list):
+        for x in node:
+            stages.extend(plan_stages(x))
+    return stages
+
+
+def print_docs(docs: list[dict], columns: list[str]) -> None:
+    for n, doc in enumerate(docs, start=1):
+        print(f"\n#{n}")
+        for c in columns:
+            print(f"{c + ':':14s}{doc.get(c)}")
+
+
+def report_summary(col, target):
+    print(f"Collection: {col.full_name}")
+    print(f"Total docs (estimated): {col.estimated_document_count()}\n")
+    print("Indexes:")
+    for idx in col.list_indexes():
+        print(f" - {idx.get('name')}: {dict(idx.get('key'))} (unique={idx.get('unique', False)})")
+    print("\nLast 10 docs:")
+    print_docs(run(col, q_last(target)), target["columns"])
+
+
+def report_sources(col, target):
+    # distinct и count по idx_source — оба покрываются индексом
+    for source in sorted(col.distinct("source")):
+        print(f"{str(source):30s} {run(col, q_source_count(source))}")
+
+
+def report_days(col, target, days):
+    for row in run(col, q_days(target, days)):
+        print(f"{row['_id']}  {row['n']}")
+
+
+def report_prices(col, target, days):
+    if "history" in target:
+        history = col.database[target["history"]]
+        for row in run(history, q_price_deltas(target, days)):
+            print(f"{row['delta']:+8d}  {row['first']} -> {row['last']}  ({row['points']} pts)  {row['url']}")
+    else:
+        for row in run(col, q_book_discounts(target, days)):
+            print(f"-{row['delta']:<7d} {row['price_base']} -> {row['price_discount']}  {row['title']}")
+
+
+def report_queries(col, target, days) -> list[tuple[str, object, tuple]]:
+    """(имя, коллекция, запрос) — всё, что отчёты выполняют, для advise."""
+    queries = [("last", col, q_last(target)), ("days", col, q_days(target, days))]
+    if "source" in target["columns"]:
+        queries.append(("source_count", col, q_source_count("<any>")))
+    if "history" in target:
+        queries.append(("price_deltas", col.database[target["history"]], q_price_deltas(target, days)))
+    else:
+        queries.append(("book_discounts", col, q_book_discounts(target, days)))
+    return queries
+
+
+def report_advise(col, target, days):
+    existing = {idx["name"] for idx in col.list_indexes()}
+    missing = [opts["name"] for _, opts in SCHEMAS.get(target["schema"], []) if opts["name"] not in existing]
+    if missing:
+        print(f"MISSING indexes on {col.full_name}: {missing} (они создаются ensure_schema при запуске скрапера)")
+
+    for name, qcol, query in report_queries(col, target, days):
+        stages = plan_stages(explain(qcol, query))
+        flags = []
+        if "COLLSCAN" in stages:
+            flags.append("COLLSCAN")
+        if "SORT" in stages:
+            flags.append("in-memory SORT")
+        status = ", ".join(flags) if flags else "ok"
+        print(f"{name:16s} {status:28s} stages={' > '.join(dict.fromkeys(stages))}")
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="Index-aware reports over scraped collections")
+    ap.add_argument("target", choices=sorted(TARGETS))
+    ap.add_argument("report", nargs="?", default="summary",
+                    choices=["summary", "sources", "days", "prices", "advise"])
+    ap.add_argument("--days", type=int, default=7)
+    args = ap.parse_args(argv)
+
+    target = TARGETS[args.target]
+    col = get_client(target["uri"])[target["db"]][target["collection"]]
+
+    if args.report == "summary":
+        report_summary(col, target)
+    elif args.report == "sources":
+        report_sources(col, target)
+    elif args.report == "days":
+        report_days(col, target, args.days)
+    elif args.report == "prices":
+        report_prices(col, target, args.days)
+    else:
+        report_advise(col, target, args.days)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# common/retention.py
+"""
+Хранение данных: TTL-политики и порционное удаление.
+
+    python -m common.retention apply [news|mvideo|books]    -> TTL-индексы (common.mongo.RETENTION_POLICIES)
+    python -m common.retention purge books --filter project_tag=lesson6_scrapy_splash_books
+
+purge удаляет порциями по _id (find _id > last по индексу _id_ -> delete_many
+по $in), с паузой между порциями и прогрессом. Последний удалённый _id
+сохраняется в checkpoint-файл, так что прерванную очистку можно продолжить
+с --resume.
+"""
+import argparse
+import hashlib
+import time
+from pathlib import Path
+
+from bson import json_util
+from pymongo import ASCENDING
+from pymongo.collection import Collection
+
+from common.mongo import RETENTION_POLICIES, ensure_schema, get_client
+from common.report import TARGETS
+
+
+def _checkpoint_path(col: Collection, flt: dict) -> Path:
+    key = hashlib.sha1(json_util.dumps(flt, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    return Path(f".purge_{col.full_name}_{key}.json")
+
+
+def chunked_delete(
+    col: Collection,
+    flt: dict,
+    batch_size: int = 1000,
+    pause: float = 0.1,
+    resume: bool = False,
+) -> int:
+    """Удаляем документы по фильтру порциями по _id. Возвращаем число удалённых."""
+    checkpoint = _checkpoint_path(col, flt)
+    last_id, deleted = None, 0
+    if resume and checkpoint.exists():
+        state = json_util.loads(checkpoint.read_text())
+        last_id, deleted = state["last_id"], state["deleted"]
+        print(f"Resuming after _id={last_id} ({deleted} already deleted)")
+
+    # сколько осталось удалить на старте — только для прогресса
+    remaining = col.count_documents(flt) if flt else col.estimated_document_count()
+    done_now = 0
+    started = time.monotonic()
+    while True:
+        query = dict(flt)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        ids = [d["_id"] for d in col.find(query, {"_id": 1}).sort("_id", ASCENDING).limit(batch_size)]
+        if not ids:
+            break
+        n = col.delete_many({"_id": {"$in": ids}}).deleted_count
+        deleted += n
+        done_now += n
+        last_id = ids[-1]
+        checkpoint.write_text(json_util.dumps({"last_id": last_id, "deleted": deleted}))
+
+        rate = done_now / max(time.monotonic() - started, 1e-9)
+        print(f"\rDeleted {done_now}/{remaining} ({rate:.0f} docs/s)", end="", flush=True)
+        if pause:
+            time.sleep(pause)
+
+    print()
+    checkpoint.unlink(missing_ok=True)
+    return deleted
+
+
+def _parse_filter(pairs: list[str]) -> dict:
+    flt = {}
+    for pair in pairs:
+        key, _, value = pair.partition("=")
+        flt[key] = value
+    return flt
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="Retention policies and chunked purges")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    ap_apply = sub.add_parser("apply", help="создать/обновить TTL-индексы")
+    ap_apply.add_argument("targets", nargs="*", help=f"из {sorted(TARGETS)}; по умолчанию все")
+
+    ap_purge = sub.add_parser("purge", help="порционно удалить документы")
+    ap_purge.add_argument("target", choices=sorted(TARGETS))
+    ap_purge.add_argument("--filter", action="append", default=[], metavar="FIELD=VALUE")
+    ap_purge.add_argument("--batch", type=int, default=1000)
+    ap_purge.add_argument("--pause", type=float, default=0.1, help="пауза между порциями, сек")
+    ap_purge.add_argument("--resume", action="store_true")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "apply":
+        unknown = [n for n in args.targets if n not in TARGETS]
+        if unknown:
+            ap.error(f"unknown targets: {unknown}")
+        for name in args.targets or sorted(TARGETS):
+            t = TARGETS[name]
+            field, days = RETENTION_POLICIES[t["schema"]]
+            col = get_client(t["uri"])[t["db"]][t["collection"]]
+            ensure_schema(col, schema=t["schema"], force=True)
+            print(f"{col.full_name}: TTL {days}d on {field}")
+        return
+
+    t = TARGETS[args.target]
+    col = get_client(t["uri"])[t["db"]][t["collection"]]
+    deleted = chunked_delete(col, _parse_filter(args.filter), args.batch, args.pause, args.resume)
+    print(f"Deleted: {deleted} documents from {col.full_name}")
+    print(f"Now total (estimated): {col.estimated_document_count()}")
+
+
+if __name__ == "__main__":
+    main()
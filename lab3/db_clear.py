@@ -1,23 +1,21 @@
 # db_clear.py
 import sys
-from mongo_utils import get_collection
 
+import repo_root  # noqa: F401  (общий пакет common/ — в корне репозитория)
+from common.retention import main as retention_main
 
-def main():
-    col = get_collection()
 
+def main():
     # Использование:
     #   python db_clear.py                -> удалить всё
     #   python db_clear.py lenta.ru       -> удалить только по source=lenta.ru
-    if len(sys.argv) == 1:
-        res = col.delete_many({})
-        print(f"Deleted ALL docs: {res.deleted_count}")
-    else:
-        source = sys.argv[1]
-        res = col.delete_many({"source": source})
-        print(f"Deleted docs for source='{source}': {res.deleted_count}")
-
-    print(f"Total after очистки: {col.count_documents({})}")
+    #   python db_clear.py lenta.ru --resume   -> продолжить прерванную очистку
+    # Удаляем порциями по _id (common/retention.py), а не одним delete_many.
+    args = ["purge", "news"]
+    rest = sys.argv[1:]
+    if rest and not rest[0].startswith("-"):
+        args += ["--filter", f"source={rest.pop(0)}"]
+    retention_main(args + rest)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,154 @@
+# frontier.py
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ASCENDING, UpdateOne
+from pymongo.collection import Collection
+
+# состояния URL во фронтире
+QUEUED = "queued"
+FETCHED = "fetched"
+FAILED = "failed"
+
+# виды URL: статья, перечитываемая лента (главная, рубрики), архив за день
+ARTICLE = "article"
+LISTING = "listing"
+ARCHIVE = "archive"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class CrawlFrontier:
+    """
+    Персистентная очередь обхода в Mongo (коллекция рядом с news).
+
+    Документ: url, kind, state, retries, title, first_seen, last_seen,
+    fetched_at, next_attempt_at, last_error. Пока URL не помечен fetched/failed,
+    он остаётся queued — после падения следующий запуск просто продолжит с него.
+
+    После ошибки URL не берётся раньше next_attempt_at: пауза растёт как
+    retry_backoff * 2**retries, так что короткий сбой (429/5xx) не сжигает
+    все ретраи за секунды. Статья в failed возвращается в работу раз в
+    failed_revisit (и снова уходит в failed, если опять не вышло).
+
+    Ленты (LISTING) в failed не уходят: исчерпав ретраи, лента считается
+    обойдённой и вернётся в работу через listing_revisit, как обычно.
+    """
+
+    def __init__(
+        self,
+        col: Collection,
+        max_retries: int = 3,
+        listing_revisit: timedelta = timedelta(minutes=10),
+        retry_backoff: timedelta = timedelta(seconds=30),
+        failed_revisit: timedelta = timedelta(days=1),
+    ):
+        self.col = col
+        self.max_retries = max_retries
+        self.listing_revisit = listing_revisit
+        self.retry_backoff = retry_backoff
+        self.failed_revisit = failed_revisit
+
+    def add(self, kind: str, entries: list[dict]) -> int:
+        """
+        entries: [{"url": ..., "title": ...}]. Новые URL встают в очередь,
+        у известных только обновляется last_seen. Возвращаем число новых.
+        """
+        if not entries:
+            return 0
+        now = _now()
+        ops = [
+            UpdateOne(
+                {"url": e["url"]},
+                {
+                    "$setOnInsert": {
+                        "url": e["url"],
+                        "kind": kind,
+                        "state": QUEUED,
+                        "retries": 0,
+                        "title": e.get("title"),
+                        "first_seen": now,
+                    },
+                    "$set": {"last_seen": now},
+                },
+                upsert=True,
+            )
+            for e in entries
+        ]
+        return self.col.bulk_write(ops, ordered=False).upserted_count
+
+    def claim(self, kinds: list[str], limit: int) -> list[dict]:
+        """
+        Очередная порция URL для обхода (не больше limit — ограниченный рабочий набор).
+        Ленты (LISTING) после listing_revisit снова считаются к обходу, failed —
+        после next_attempt_at. URL, ждущие повтора после ошибки, пропускаются.
+        Первыми идут ещё не обходившиеся URL, затем — дольше всех не обходившиеся,
+        так что старые ленты не вытесняют свежие.
+        """
+        if limit <= 0:
+            return []
+        now = _now()
+        query = {"$or": [
+            # $not/$gt: подходят и документы без next_attempt_at
+            {"kind": {"$in": kinds}, "state": QUEUED, "next_attempt_at": {"$not": {"$gt": now}}},
+            {"kind": {"$in": kinds}, "state": FAILED, "next_attempt_at": {"$lte": now}},
+        ]}
+        if LISTING in kinds:
+            query["$or"].append({
+                "kind": LISTING,
+                "state": FETCHED,
+                "fetched_at": {"$lt": now - self.listing_revisit},
+            })
+        cursor = self.col.find(query, {"_id": 0, "url": 1, "kind": 1, "title": 1, "retries": 1})
+        return list(cursor.sort([("fetched_at", ASCENDING), ("last_seen", ASCENDING)]).limit(limit))
+
+    def mark_fetched(self, urls: list[str]) -> None:
+        if urls:
+            self.col.update_many(
+                {"url": {"$in": urls}},
+                {
+                    "$set": {"state": FETCHED, "fetched_at": _now(), "retries": 0},
+                    "$unset": {"last_error": "", "next_attempt_at": ""},
+                },
+            )
+
+    def mark_failed(self, url: str, error: str) -> None:
+        """
+        Ошибка: ещё раз в очередь (не раньше next_attempt_at), пока не исчерпали
+        max_retries. Потом статья уходит в failed до failed_revisit, а лента —
+        в fetched (до следующего listing_revisit).
+        """
+        now = _now()
+        retries = {"$add": ["$retries", 1]}
+        exhausted = {"$gte": [retries, self.max_retries]}
+        listing_backoff = {"$and": [exhausted, {"$eq": ["$kind", LISTING]}]}
+        # "$retries" в том же $set — ещё старое значение: 1-я ошибка ждёт retry_backoff, 2-я — вдвое дольше...
+        backoff_ms = self.retry_backoff.total_seconds() * 1000
+        retry_at = {"$add": [now, {"$multiply": [backoff_ms, {"$pow": [2, "$retries"]}]}]}
+        self.col.update_one({"url": url}, [{"$set": {
+            "retries": {"$cond": [listing_backoff, 0, retries]},
+            "last_error": error[:500],
+            "state": {"$cond": [listing_backoff, FETCHED, {"$cond": [exhausted, FAILED, QUEUED]}]},
+            "fetched_at": {"$cond": [listing_backoff, now, "$fetched_at"]},
+            "next_attempt_at": {"$cond": [
+                listing_backoff, "$$REMOVE", {"$cond": [exhausted, now + self.failed_revisit, retry_at]},
+            ]},
+        }}])
+
+    def archive_listings(self, url_regex: str, keep: list[str]) -> int:
+        """
+        Ленты, подходящие под url_regex (кроме keep), переводим в ARCHIVE:
+        обходим их ещё один раз (добрать статьи конца дня) и больше не
+        перечитываем. Так вчерашний «сегодняшний» архив перестаёт занимать
+        бюджет лент. Возвращаем число переведённых.
+        """
+        res = self.col.update_many(
+            {"kind": LISTING, "url": {"$regex": url_regex, "$nin": keep}},
+            {"$set": {"kind": ARCHIVE, "state": QUEUED, "retries": 0}, "$unset": {"next_attempt_at": ""}},
+        )
+        return res.modified_count
+
+    def counts(self) -> dict[str, int]:
+        pipeline = [{"$group": {"_id": {"kind": "$kind", "state": "$state"}, "n": {"$sum": 1}}}]
+        return {f"{r['_id']['kind']}/{r['_id']['state']}": r["n"] for r in self.col.aggregate(pipeline)}
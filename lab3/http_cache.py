@@ -0,0 +1,124 @@
+# http_cache.py
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+
+@dataclass
+class CachedResponse:
+    body: str
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float
+
+    def conditional_headers(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """
+    Дисковый кэш ответов для fetch() (один sqlite-файл).
+
+    - хранит тело + ETag/Last-Modified, чтобы перепроверять страницу условным GET;
+    - пока запись свежая (TTL по URL) — в сеть вообще не ходим;
+    - общий размер тел ограничен max_bytes, лишнее вытесняется по LRU.
+
+    ttl_rules — список (regex, ttl_seconds), первое совпадение по URL побеждает.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 200 * 1024 * 1024,
+        default_ttl: float = 300.0,
+        ttl_rules: list[tuple[str, float]] | None = None,
+    ):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.ttl_rules = [(re.compile(p), ttl) for p, ttl in (ttl_rules or [])]
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " url TEXT PRIMARY KEY,"
+            " body TEXT NOT NULL,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " fetched_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " size INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses(accessed_at)")
+        self._db.commit()
+
+    def ttl_for(self, url: str) -> float:
+        for pattern, ttl in self.ttl_rules:
+            if pattern.search(url):
+                return ttl
+        return self.default_ttl
+
+    def get(self, url: str) -> CachedResponse | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+        return CachedResponse(*row)
+
+    def contains(self, url: str) -> bool:
+        """Есть ли запись (без обновления LRU — только проверка)."""
+        with self._lock:
+            row = self._db.execute("SELECT 1 FROM responses WHERE url = ?", (url,)).fetchone()
+        return row is not None
+
+    def is_fresh(self, url: str, entry: CachedResponse) -> bool:
+        return time.time() - entry.fetched_at < self.ttl_for(url)
+
+    def revalidated(self, url: str) -> None:
+        """304 Not Modified: запись снова свежая."""
+        with self._lock:
+            now = time.time()
+            self._db.execute(
+                "UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?",
+                (now, now, url),
+            )
+            self._db.commit()
+
+    def put(self, url: str, body: str, etag: str | None, last_modified: str | None) -> None:
+        now = time.time()
+        size = len(body.encode("utf-8"))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses"
+                " (url, body, etag, last_modified, fetched_at, accessed_at, size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, body, etag, last_modified, now, now, size),
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute("SELECT url, size FROM responses ORDER BY accessed_at").fetchall()
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
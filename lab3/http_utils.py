@@ -0,0 +1,104 @@
+# http_utils.py
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; NewsParserHomework/1.0)"
+}
+
+_session_lock = threading.Lock()
+_session: requests.Session | None = None
+
+
+def get_session(pool_size: int = 16) -> requests.Session:
+    """
+    Один keep-alive Session на процесс: соединения переиспользуются,
+    а не открываются заново на каждый fetch().
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            s.headers.update(HEADERS)
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            _session = s
+        return _session
+
+
+class TokenBucket:
+    """
+    Token bucket для одного хоста. rate — токенов в секунду,
+    burst — максимальный запас токенов.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """
+    Вежливость к сайту вместо фиксированного sleep: по token bucket на хост.
+    Скорость подстраивается (AIMD):
+    - 429 / 5xx или медленный ответ -> rate делим пополам;
+    - нормальный ответ -> rate понемногу растёт до max_rate.
+    """
+
+    def __init__(
+        self,
+        rate: float = 5.0,
+        burst: float = 5.0,
+        min_rate: float = 0.5,
+        max_rate: float = 20.0,
+        slow_latency: float = 2.0,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.slow_latency = slow_latency
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc
+        with self._lock:
+            b = self._buckets.get(host)
+            if b is None:
+                b = self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return b
+
+    def acquire(self, url: str) -> None:
+        self._bucket(url).acquire()
+
+    def observe(self, url: str, status: int | None, latency: float) -> None:
+        b = self._bucket(url)
+        with b.lock:
+            if status is None or status == 429 or status >= 500 or latency > self.slow_latency:
+                b.rate = max(self.min_rate, b.rate / 2)
+            else:
+                b.rate = min(self.max_rate, b.rate + 0.5)
+
+    def rate_for(self, url: str) -> float:
+        return self._bucket(url).rate
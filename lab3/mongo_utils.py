@@ -1,10 +1,14 @@
 # mongo_utils.py
-from pymongo import MongoClient, ASCENDING
+
 from pymongo.collection import Collection
 
+import repo_root  # noqa: F401  (общий пакет common/ — в корне репозитория)
+from common.mongo import ensure_schema, get_client
+
 DEFAULT_MONGO_URI = "mongodb://localhost:27017"
 DEFAULT_DB_NAME = "news_db"
 DEFAULT_COLLECTION = "news"
+DEFAULT_FRONTIER_COLLECTION = "news_frontier"
 
 
 def get_collection(
@@ -12,13 +16,17 @@ def get_collection(
     db_name: str = DEFAULT_DB_NAME,
     collection_name: str = DEFAULT_COLLECTION,
 ) -> Collection:
-    client = MongoClient(mongo_uri)
-    db = client[db_name]
-    col = db[collection_name]
-
-    col.create_index([("link", ASCENDING)], unique=True, name="uniq_link")
+    # клиент берём из реестра, индексы создаются один раз на процесс
+    col = get_client(mongo_uri)[db_name][collection_name]
+    ensure_schema(col, schema=DEFAULT_COLLECTION)
+    return col
 
-    col.create_index([("source", ASCENDING)], name="idx_source")
-    col.create_index([("published_at", ASCENDING)], name="idx_published_at")
 
+def get_frontier_collection(
+    mongo_uri: str = DEFAULT_MONGO_URI,
+    db_name: str = DEFAULT_DB_NAME,
+    collection_name: str = DEFAULT_FRONTIER_COLLECTION,
+) -> Collection:
+    col = get_client(mongo_uri)[db_name][collection_name]
+    ensure_schema(col, schema=DEFAULT_FRONTIER_COLLECTION)
     return col
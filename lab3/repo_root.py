@@ -0,0 +1,8 @@
+# repo_root.py
+"""Корень репозитория в sys.path: отсюда импортируется общий пакет common/."""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
@@ -0,0 +1,75 @@
+# run_sources.py
+"""
+Параллельный прогон всех адаптеров из sources.py.
+
+Каждый источник обрабатывается в отдельном процессе (lxml-парсинг разных
+сайтов занимает все ядра, а не один интерпретатор), со своим rate limiter.
+Обход — тот же, что у scrape_news_mongo.py: через персистентный фронтир
+источника, пачками статей с записью в news после каждой пачки.
+
+Запись идёт через BulkNewsWriter, но он общий в пределах процесса, а не на
+все источники: фронтир отмечает статью fetched только после записи её
+пачки, и пересылка документов в родительский процесс разорвала бы эту
+связку (падение родителя теряло бы уже отмеченные статьи).
+
+Использование:
+    python run_sources.py               -> все источники
+    python run_sources.py lenta.ru      -> только перечисленные
+"""
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+import scrape_news_mongo
+from frontier import CrawlFrontier
+from http_utils import HostRateLimiter
+from mongo_utils import get_collection, get_frontier_collection
+from scrape_news_mongo import BulkNewsWriter
+from sources import SOURCES
+
+WORKERS = int(os.getenv("NEWS_WORKERS", str(os.cpu_count() or 1)))
+
+
+def scrape_source(name: str) -> tuple[str, dict[str, int]]:
+    """Выполняется в дочернем процессе: прогон источника по его фронтиру. Возвращает (source, счётчики)."""
+    src = SOURCES[name]
+    # свой rate limiter на каждый источник
+    scrape_news_mongo.rate_limiter = HostRateLimiter(**src.rate_limits)
+
+    col = get_collection()
+    frontier = CrawlFrontier(get_frontier_collection(collection_name=src.frontier_collection))
+    counts = src.crawl(col, frontier, BulkNewsWriter(col, frontier))
+    counts["frontier"] = frontier.counts()
+    return name, counts
+
+
+def main():
+    names = sys.argv[1:] or list(SOURCES)
+    unknown = [n for n in names if n not in SOURCES]
+    if unknown:
+        sys.exit(f"Unknown sources: {unknown}. Available: {list(SOURCES)}")
+
+    results: dict[str, dict] = {}
+    # spawn, а не fork: MongoClient из реестра и sqlite-соединение http_cache,
+    # открытые в родителе, нельзя наследовать через fork()
+    with ProcessPoolExecutor(max_workers=max(1, min(WORKERS, len(names))), mp_context=get_context("spawn")) as pool:
+        futures = {pool.submit(scrape_source, n): n for n in names}
+        for fut in as_completed(futures):
+            name = futures[fut]
+            try:
+                _, results[name] = fut.result()
+            except Exception as e:
+                # один упавший источник не валит остальные
+                print(f"[{name}] failed: {e!r}")
+                continue
+            print(f"[{name}] {results[name]}")
+
+    print("\nDone.")
+    for name in names:
+        r = results.get(name, {})
+        print(f"{name}: queued={r.get('queued', 0)} inserted={r.get('inserted', 0)} failed={r.get('failed', 0)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,63 @@
 # scrape_news_mongo.py
+import os
+import re
 import time
-from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
 from urllib.parse import urljoin
 
 import requests
-from lxml import html
+from lxml import etree, html
+from pymongo import UpdateOne
 
-from mongo_utils import get_collection
+from frontier import ARCHIVE, ARTICLE, LISTING, CrawlFrontier
+from http_cache import HttpCache
+from http_utils import HostRateLimiter, get_session
+from mongo_utils import get_collection, get_frontier_collection
+
+import repo_root  # noqa: F401  (общий пакет common/ — в корне репозитория)
+from common.extract import Field, format_stats
+from common.metrics import configure_from_env, metrics
 
 
 BASE_URL = "https://lenta.ru/"
 SOURCE_NAME = "lenta.ru"
+SCRAPER = "news"
 
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (compatible; NewsParserHomework/1.0)"
-}
 TIMEOUT = 15
 
+# статьи читаем потоково и обрываем загрузку, как только нашли дату
+STREAM_PARSE = os.getenv("NEWS_STREAM_PARSE", "1") == "1"
+STREAM_CHUNK_SIZE = 16 * 1024
+
+# сколько статей качаем параллельно (1 -> последовательный режим)
+CONCURRENCY = int(os.getenv("NEWS_CONCURRENCY", "8"))
+
+# рабочий набор одного запуска: сколько лент и статей берём из фронтира
+LISTINGS_PER_RUN = int(os.getenv("NEWS_LISTINGS_PER_RUN", "20"))
+ARTICLES_PER_RUN = int(os.getenv("NEWS_ARTICLES_PER_RUN", "1000"))
+ARTICLE_BATCH = 100
+# за сколько прошлых дней обходим архив lenta.ru/news/YYYY/MM/DD/
+ARCHIVE_DAYS = int(os.getenv("NEWS_ARCHIVE_DAYS", "1"))
+
+ARTICLE_RE = re.compile(r"/news/\d{4}/\d{2}/\d{2}/[^/]+/?$")
+# архив за день: /news/YYYY/MM/DD/
+DAY_ARCHIVE_RE = r"/news/\d{4}/\d{2}/\d{2}/$"
+
+rate_limiter = HostRateLimiter()
+
+# дисковый кэш ответов (пустая строка в NEWS_HTTP_CACHE — выключить)
+HTTP_CACHE_PATH = os.getenv("NEWS_HTTP_CACHE", "http_cache.sqlite")
+http_cache = HttpCache(
+    HTTP_CACHE_PATH,
+    max_bytes=int(os.getenv("NEWS_HTTP_CACHE_MAX_MB", "200")) * 1024 * 1024,
+    # ленты (главная, архив за день, рубрики) меняются постоянно, статьи после публикации — почти никогда;
+    # длинный TTL только у статей: архив /news/YYYY/MM/DD/ тоже лежит под /news/
+    default_ttl=60,
+    ttl_rules=[(ARTICLE_RE.pattern, 7 * 24 * 3600)],
+) if HTTP_CACHE_PATH else None
+
 
 def now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
@@ -46,21 +87,133 @@ def parse_iso_datetime(dt_str: str) -> str | None:
 
 
 def fetch(url: str) -> str:
-    r = requests.get(url, headers=HEADERS, timeout=TIMEOUT)
+    cached = http_cache.get(url) if http_cache else None
+    if cached and http_cache.is_fresh(url, cached):
+        metrics.inc("cache_hits_total", scraper=SCRAPER, kind="fresh")
+        return cached.body
+
+    headers = cached.conditional_headers() if cached else {}
+
+    rate_limiter.acquire(url)
+    started = time.monotonic()
+    try:
+        with metrics.timer("stage_seconds", scraper=SCRAPER, stage="fetch"):
+            r = get_session(CONCURRENCY).get(url, headers=headers, timeout=TIMEOUT)
+    except requests.RequestException:
+        rate_limiter.observe(url, None, time.monotonic() - started)
+        raise
+    rate_limiter.observe(url, r.status_code, time.monotonic() - started)
+
+    # 304 Not Modified — отдаём тело с диска
+    if cached and r.status_code == 304:
+        http_cache.revalidated(url)
+        metrics.inc("cache_hits_total", scraper=SCRAPER, kind="revalidated")
+        return cached.body
+
     r.raise_for_status()
+    metrics.inc("bytes_total", len(r.content), scraper=SCRAPER)
+    if http_cache:
+        http_cache.put(url, r.text, r.headers.get("ETag"), r.headers.get("Last-Modified"))
     return r.text
 
 
-def extract_mainpage_items(main_html: str) -> list[dict]:
+def fetch_published_at_streamed(url: str) -> str | None:
+    """
+    Качаем статью потоково и закрываем ответ, как только дата найдена —
+    остаток страницы (обычно большая часть байт) не скачивается и не парсится.
+
+    Обрезанное тело в дисковый кэш не кладём: экономия потока именно в том,
+    что страницу целиком не качаем, а статья фронтиром и так качается один раз.
+    В кэш попадает только страница, дочитанная до конца (дата не нашлась
+    раньше). Полный кэш статей — NEWS_STREAM_PARSE=0.
+    """
+    rate_limiter.acquire(url)
+    started = time.monotonic()
+    try:
+        r = get_session(CONCURRENCY).get(url, timeout=TIMEOUT, stream=True)
+    except requests.RequestException:
+        rate_limiter.observe(url, None, time.monotonic() - started)
+        raise
+    rate_limiter.observe(url, r.status_code, time.monotonic() - started)
+
+    with r:
+        r.raise_for_status()
+        encoding = r.encoding or "utf-8"
+        body = _RecordedStream(r.iter_content(STREAM_CHUNK_SIZE))
+        # загрузка и разбор идут вперемешку — считаем их вместе как fetch
+        with metrics.timer("stage_seconds", scraper=SCRAPER, stage="fetch"):
+            published_at = extract_published_at_stream(body, encoding=encoding)
+        if body.complete and http_cache:
+            http_cache.put(
+                url, body.text(encoding), r.headers.get("ETag"), r.headers.get("Last-Modified")
+            )
+        return published_at
+
+
+class _RecordedStream:
+    """Итератор по кускам ответа: считает байты и помнит, дочитан ли ответ до конца."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self.chunks = chunks
+        self.parts: list[bytes] = []
+        self.complete = False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            metrics.inc("bytes_total", len(chunk), scraper=SCRAPER)
+            self.parts.append(chunk)
+            yield chunk
+        self.complete = True
+
+    def text(self, encoding: str) -> str:
+        return b"".join(self.parts).decode(encoding, errors="replace")
+
+
+def fetch_article_published_at(link: str) -> str | None:
+    """Дата публикации статьи lenta.ru; сетевые ошибки пробрасываются (нужно фронтиру)."""
+    # если страница уже в дисковом кэше — выгоднее взять её оттуда целиком
+    if STREAM_PARSE and not (http_cache and http_cache.contains(link)):
+        try:
+            return fetch_published_at_streamed(link)
+        except requests.RequestException:
+            raise
+        except Exception:
+            pass  # fallback: полный fetch + полный парсинг
+    return extract_published_at(fetch(link))
+
+
+MAIN_LINKS = Field("lenta.main_links", [
+    # якоря с href содержащим "/news/"
+    ("news_anchors", '//a[contains(@href, "/news/")]'),
+])
+ANCHOR_TEXT = etree.XPath(".//text()")
+SECTION_LINKS = Field("lenta.section_links", [
+    ("rubrics_anchors", '//a[starts-with(@href, "/rubrics/")]/@href'),
+])
+
+PUBLISHED_AT = Field(
+    "lenta.published_at",
+    [
+        ("time_datetime", "string(//time/@datetime)"),
+        ("meta_article_published_time", 'string(//meta[@property="article:published_time"]/@content)'),
+        ("meta_date_published", 'string(//meta[@itemprop="datePublished"]/@content)'),
+    ],
+    accept=lambda v: parse_iso_datetime(v) is not None,
+)
+
+
+def extract_mainpage_items(main_html: str, limit: int | None = 30) -> list[dict]:
     """
     Достаём заголовок и ссылку с главной. XPath используется везде.
     Верстка может меняться, поэтому берём несколько XPath-кандидатов.
     """
-    tree = html.fromstring(main_html)
+    with metrics.timer("stage_seconds", scraper=SCRAPER, stage="parse"):
+        return _extract_mainpage_items(html.fromstring(main_html), limit)
 
+
+def _extract_mainpage_items(tree, limit: int | None) -> list[dict]:
     # Кандидаты на ссылки (берём те, что ведут на статьи /news/)
-    # 1) якоря с href содержащим "/news/"
-    link_nodes = tree.xpath('//a[contains(@href, "/news/")]')
+    link_nodes = MAIN_LINKS.extract(tree, default=[])
 
     items = []
     seen_links = set()
@@ -77,7 +230,7 @@ def extract_mainpage_items(main_html: str) -> list[dict]:
             continue
 
         # Текст заголовка: либо текст внутри <a>, либо дочерних узлов
-        title = " ".join(a.xpath(".//text()")).strip()
+        title = " ".join(ANCHOR_TEXT(a)).strip()
         title = " ".join(title.split())
 
         if not title:
@@ -88,101 +241,241 @@ def extract_mainpage_items(main_html: str) -> list[dict]:
         seen_links.add(link)
         items.append({"title": title, "link": link})
 
-    # ограничим, чтобы не бомбить сайт (достаточно для ДЗ)
-    return items[:30]
+    # ограничим, чтобы не бомбить сайт (достаточно для ДЗ); фронтиру нужен весь список
+    return items[:limit] if limit is not None else items
+
+
+def extract_section_links(page_html: str) -> list[str]:
+    """Ссылки на рубрики — их тоже обходим как ленты."""
+    hrefs = SECTION_LINKS.extract(html.fromstring(page_html), default=[])
+    return list(dict.fromkeys(urljoin(BASE_URL, h) for h in hrefs))
 
 
 def extract_published_at(article_html: str) -> str | None:
     """
     Дата публикации — с страницы новости.
-    Пробуем несколько XPath:
+    Пробуем несколько XPath (цепочка PUBLISHED_AT):
     - <time datetime="...">
     - meta property="article:published_time"
     - meta itemprop="datePublished"
     """
-    tree = html.fromstring(article_html)
+    with metrics.timer("stage_seconds", scraper=SCRAPER, stage="parse"):
+        tree = html.fromstring(article_html)
+        return parse_iso_datetime(PUBLISHED_AT.extract(tree))
+
+
+def _published_candidate(el) -> str | None:
+    if el.tag == "time":
+        return el.get("datetime")
+    if el.tag == "meta" and (
+        el.get("property") == "article:published_time"
+        or el.get("itemprop") == "datePublished"
+    ):
+        return el.get("content")
+    return None
 
-    # 1) time[@datetime]
-    dt = tree.xpath("string(//time/@datetime)").strip()
-    iso = parse_iso_datetime(dt)
-    if iso:
-        return iso
 
-    # 2) og/article:published_time
-    dt = tree.xpath('string(//meta[@property="article:published_time"]/@content)').strip()
-    iso = parse_iso_datetime(dt)
-    if iso:
-        return iso
+def extract_published_at_stream(chunks: Iterable[bytes], encoding: str = "utf-8") -> str | None:
+    """
+    Потоковый вариант extract_published_at: кормим HTMLPullParser кусками
+    и выходим на первом элементе с пригодной датой. Те же три источника
+    (time/@datetime, article:published_time, datePublished), но берётся
+    тот, что встретился раньше в документе — обычно это meta в <head>.
+    """
+    parser = etree.HTMLPullParser(events=("start",), encoding=encoding)
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, el in parser.read_events():
+            iso = parse_iso_datetime(_published_candidate(el))
+            if iso:
+                return iso
+
+    parser.close()
+    for _, el in parser.read_events():
+        iso = parse_iso_datetime(_published_candidate(el))
+        if iso:
+            return iso
+    return None
 
-    # 3) schema.org datePublished
-    dt = tree.xpath('string(//meta[@itemprop="datePublished"]/@content)').strip()
-    iso = parse_iso_datetime(dt)
-    if iso:
-        return iso
 
-    return None
+def filter_new_links(col, links: list[str]) -> set[str]:
+    """
+    Одним запросом по индексу uniq_link узнаём, какие ссылки уже есть в базе.
+    Возвращаем только новые — их и нужно качать.
+    """
+    if not links:
+        return set()
+    known = {d["link"] for d in col.find({"link": {"$in": links}}, {"_id": 0, "link": 1})}
+    return {link for link in links if link not in known}
 
 
-def upsert_news(col, source: str, title: str, link: str, published_at: str | None) -> bool:
+def bulk_upsert_news(col, source: str, docs: list[dict]) -> int:
+    """
+    Пачкой вставляем новости (title, link, published_at) одним unordered bulk_write.
+    $setOnInsert — старые записи не перетираем. Возвращаем число вставленных.
     """
-    Вставляем только если новости ещё не было (уникальность по link).
-    Возвращаем True если вставили, False если уже существовала.
+    if not docs:
+        return 0
+    scraped_at = now_iso()
+    # scraped_ts — то же время как Date, по нему работает TTL-индекс (см. RETENTION_POLICIES)
+    scraped_ts = datetime.now(timezone.utc)
+    ops = [
+        UpdateOne(
+            {"link": d["link"]},
+            {"$setOnInsert": {
+                "source": source,
+                "title": d["title"],
+                "link": d["link"],
+                "published_at": d.get("published_at"),
+                "scraped_at": scraped_at,
+                "scraped_ts": scraped_ts,
+            }},
+            upsert=True,
+        )
+        for d in docs
+    ]
+    with metrics.timer("stage_seconds", scraper=SCRAPER, stage="db_write"):
+        res = col.bulk_write(ops, ordered=False)
+    metrics.inc("items_total", res.upserted_count, scraper=SCRAPER)
+    return res.upserted_count
+
+
+class BulkNewsWriter:
+    """
+    Общий писатель прогона: копит документы по источникам и пишет их
+    unordered-пачками (bulk_upsert_news). Ссылки записанной пачки сразу
+    отмечаются во фронтире как fetched — до записи статья остаётся в работе,
+    и падение процесса теряет максимум одну пачку.
     """
-    doc = {
-        "source": source,
-        "title": title,
-        "link": link,
-        "published_at": published_at,
-        "scraped_at": now_iso(),
-    }
 
-    # upsert через $setOnInsert — не перетираем старые записи
-    res = col.update_one(
-        {"link": link},
-        {"$setOnInsert": doc},
-        upsert=True
-    )
-    return res.upserted_id is not None
+    def __init__(self, col, frontier: CrawlFrontier, batch_size: int = ARTICLE_BATCH):
+        self.col = col
+        self.frontier = frontier
+        self.batch_size = batch_size
+        self.buffers: dict[str, list[dict]] = {}
+        self.inserted: dict[str, int] = {}
+
+    def add(self, source: str, docs: list[dict]) -> None:
+        buf = self.buffers.setdefault(source, [])
+        buf.extend(docs)
+        if len(buf) >= self.batch_size:
+            self.flush(source)
+
+    def flush(self, source: str | None = None) -> None:
+        for name in [source] if source else list(self.buffers):
+            docs = self.buffers.pop(name, [])
+            if docs:
+                self.inserted[name] = self.inserted.get(name, 0) + bulk_upsert_news(self.col, name, docs)
+                self.frontier.mark_fetched([d["link"] for d in docs])
+
+
+def seed_frontier(frontier: CrawlFrontier) -> None:
+    """Главная и архив за сегодня перечитываются, прошлые дни архива — один раз."""
+    today = datetime.now(timezone.utc).date()
+    today_url = urljoin(BASE_URL, today.strftime("/news/%Y/%m/%d/"))
+    # архив, бывший «сегодняшним» в прошлые запуски, больше не перечитываем
+    frontier.archive_listings(DAY_ARCHIVE_RE, keep=[today_url])
+    frontier.add(LISTING, [
+        {"url": BASE_URL},
+        {"url": today_url},
+    ])
+    frontier.add(ARCHIVE, [
+        {"url": urljoin(BASE_URL, (today - timedelta(days=d)).strftime("/news/%Y/%m/%d/"))}
+        for d in range(1, ARCHIVE_DAYS + 1)
+    ])
+
+
+def crawl_listings(col, frontier: CrawlFrontier, source) -> int:
+    """Обходим порцию лент источника (sources.NewsSource): новые статьи и рубрики кладём во фронтир."""
+    queued = 0
+    for entry in frontier.claim([LISTING, ARCHIVE], LISTINGS_PER_RUN):
+        url = entry["url"]
+        if entry.get("retries"):
+            metrics.inc("retries_total", scraper=SCRAPER)
+        try:
+            page_html = fetch(url)
+        except Exception as e:
+            frontier.mark_failed(url, repr(e))
+            continue
 
+        items = [it for it in source.extract_mainpage_items(page_html) if source.article_re.search(it["link"])]
+        # уже сохранённые в news статьи во фронтир не кладём
+        new_links = filter_new_links(col, [it["link"] for it in items])
+        queued += frontier.add(ARTICLE, [
+            {"url": it["link"], "title": it["title"]} for it in items if it["link"] in new_links
+        ])
+        frontier.add(LISTING, [{"url": u} for u in source.extract_section_links(page_html)])
+        frontier.mark_fetched([url])
+    return queued
 
-def main():
-    col = get_collection()  # при желании передайте mongo_uri/db/collection
 
-    main_html = fetch(BASE_URL)
-    items = extract_mainpage_items(main_html)
+def _published_at_or_error(source, link: str) -> tuple[str | None, str | None]:
+    try:
+        return source.fetch_published_at(link), None
+    except Exception as e:
+        return None, repr(e)
 
-    inserted = 0
-    skipped = 0
 
-    for i, it in enumerate(items, start=1):
-        link = it["link"]
-        title = it["title"]
+def crawl_articles(col, frontier: CrawlFrontier, source, writer: BulkNewsWriter | None = None) -> tuple[int, int]:
+    """
+    Качаем статьи источника из фронтира пачками по ARTICLE_BATCH (не больше
+    ARTICLES_PER_RUN за запуск). Пачки уходят в writer (по умолчанию — свой
+    BulkNewsWriter), он пишет news и отмечает фронтир.
+    """
+    writer = writer or BulkNewsWriter(col, frontier)
+    before = writer.inserted.get(source.name, 0)
+    failed = 0
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, CONCURRENCY)) as pool:
+        while done < ARTICLES_PER_RUN:
+            batch = frontier.claim([ARTICLE], min(ARTICLE_BATCH, ARTICLES_PER_RUN - done))
+            if not batch:
+                break
+            done += len(batch)
+            metrics.inc("retries_total", sum(1 for e in batch if e.get("retries")), scraper=SCRAPER)
+
+            results = list(pool.map(lambda link: _published_at_or_error(source, link), [e["url"] for e in batch]))
+
+            docs = []
+            for entry, (published_at, error) in zip(batch, results):
+                if error:
+                    failed += 1
+                    frontier.mark_failed(entry["url"], error)
+                    continue
+                docs.append({"title": entry.get("title") or "", "link": entry["url"], "published_at": published_at})
+                print(f"+ fetched: {entry.get('title')}")
+
+            writer.add(source.name, docs)
+    writer.flush(source.name)
+    return writer.inserted.get(source.name, 0) - before, failed
 
-        # берём published_at со страницы статьи
-        published_at = None
-        try:
-            article_html = fetch(link)
-            published_at = extract_published_at(article_html)
-        except Exception:
-            # не валим весь прогон из-за одной страницы
-            published_at = None
 
-        ok = upsert_news(col, SOURCE_NAME, title, link, published_at)
-        if ok:
-            inserted += 1
-            print(f"[{i}] + inserted: {title}")
-        else:
-            skipped += 1
-            print(f"[{i}] = exists:   {title}")
+def main():
+    # адаптер lenta.ru (sources.py) сам импортирует этот модуль — поэтому импорт здесь
+    from sources import SOURCES
+
+    configure_from_env()
+    source = SOURCES[SOURCE_NAME]
+    col = get_collection()  # при желании передайте mongo_uri/db/collection
+    frontier = CrawlFrontier(get_frontier_collection(collection_name=source.frontier_collection))
 
-        # небольшой троттлинг (вежливо к сайту)
-        time.sleep(0.2)
+    counts = source.crawl(col, frontier)
 
     print("\nDone.")
-    print(f"Inserted: {inserted}")
-    print(f"Skipped:  {skipped}")
+    print(f"Queued:   {counts['queued']}")
+    print(f"Inserted: {counts['inserted']}")
+    print(f"Failed:   {counts['failed']}")
+    print(f"Frontier: {frontier.counts()}")
     print(f"Total in DB: {col.count_documents({})}")
 
+    print("\nSelector stats:")
+    print(format_stats())
+    metrics.close()
+
 
 if __name__ == "__main__":
-    main()
+    # sources.py импортирует модуль по имени scrape_news_mongo; запускаем main()
+    # оттуда же, чтобы кэш и rate limiter не жили в двух копиях модуля
+    import scrape_news_mongo
+
+    scrape_news_mongo.main()
@@ -0,0 +1,99 @@
+# sources.py
+"""
+Адаптеры источников новостей. Каждый адаптер знает свою главную страницу,
+как достать с ленты (title, link), какие ссылки считать статьями, как
+достать дату публикации со статьи и чем засеять фронтир. Сам обход
+(crawl_listings / crawl_articles в scrape_news_mongo) общий и работает
+только через методы адаптера.
+Схема в Mongo (поле source, индекс idx_source) общая для всех источников,
+фронтир у каждого источника свой (frontier_collection).
+
+Новый источник: наследуемся от NewsSource и вешаем @register_source.
+"""
+import re
+from abc import ABC, abstractmethod
+
+import scrape_news_mongo as lenta
+from frontier import LISTING, CrawlFrontier
+from mongo_utils import DEFAULT_FRONTIER_COLLECTION
+
+SOURCES: dict[str, "NewsSource"] = {}
+
+
+def register_source(cls):
+    SOURCES[cls.name] = cls()
+    return cls
+
+
+class NewsSource(ABC):
+    name: str = ""
+    base_url: str = ""
+    # какие ссылки с лент — статьи (их кладём во фронтир как ARTICLE)
+    article_re: re.Pattern = re.compile(r"$^")
+    # параметры HostRateLimiter для хостов этого источника
+    rate_limits: dict = {}
+
+    @property
+    def frontier_collection(self) -> str:
+        return f"{DEFAULT_FRONTIER_COLLECTION}_{re.sub(r'[^0-9a-z]+', '_', self.name.lower())}"
+
+    @abstractmethod
+    def extract_mainpage_items(self, page_html: str) -> list[dict]:
+        """Все (title, link) со страницы-ленты, ссылки абсолютные."""
+
+    @abstractmethod
+    def extract_published_at(self, article_html: str) -> str | None:
+        ...
+
+    def extract_section_links(self, page_html: str) -> list[str]:
+        """Ссылки на другие ленты (рубрики) — тоже обходим. По умолчанию нет."""
+        return []
+
+    def fetch_published_at(self, link: str) -> str | None:
+        """Дата со страницы статьи; сетевые ошибки пробрасываются (нужно фронтиру)."""
+        return self.extract_published_at(lenta.fetch(link))
+
+    def seed(self, frontier: CrawlFrontier) -> None:
+        """Стартовые ленты во фронтире. По умолчанию — главная."""
+        frontier.add(LISTING, [{"url": self.base_url}])
+
+    def crawl(self, col, frontier: CrawlFrontier, writer: "lenta.BulkNewsWriter | None" = None) -> dict[str, int]:
+        """Один прогон по фронтиру: ленты -> новые статьи -> запись в col. Счётчики прогона."""
+        self.seed(frontier)
+        queued = lenta.crawl_listings(col, frontier, self)
+        inserted, failed = lenta.crawl_articles(col, frontier, self, writer)
+        return {"queued": queued, "inserted": inserted, "failed": failed}
+
+
+@register_source
+class LentaSource(NewsSource):
+    name = lenta.SOURCE_NAME
+    article_re = lenta.ARTICLE_RE
+    rate_limits = {"rate": 5.0, "burst": 5.0, "max_rate": 20.0}
+
+    @property
+    def base_url(self) -> str:
+        # читаем из модуля: бенчмарк подменяет lenta.BASE_URL на локальный сайт
+        return lenta.BASE_URL
+
+    @property
+    def frontier_collection(self) -> str:
+        # фронтир lenta.ru появился раньше адаптеров — коллекцию не переименовываем
+        return DEFAULT_FRONTIER_COLLECTION
+
+    def extract_mainpage_items(self, page_html: str) -> list[dict]:
+        return lenta.extract_mainpage_items(page_html, limit=None)
+
+    def extract_published_at(self, article_html: str) -> str | None:
+        return lenta.extract_published_at(article_html)
+
+    def extract_section_links(self, page_html: str) -> list[str]:
+        return lenta.extract_section_links(page_html)
+
+    def fetch_published_at(self, link: str) -> str | None:
+        # потоковый разбор с ранним выходом (см. scrape_news_mongo)
+        return lenta.fetch_article_published_at(link)
+
+    def seed(self, frontier: CrawlFrontier) -> None:
+        # главная + архив /news/YYYY/MM/DD/ за сегодня и прошлые дни
+        lenta.seed_frontier(frontier)
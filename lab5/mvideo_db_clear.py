@@ -1,17 +1,17 @@
 # lesson5_mvideo_db_clear.py
-import os
-from pymongo import MongoClient
+import sys
+
+import repo_root  # noqa: F401  (общий пакет common/ — в корне репозитория)
+from common.retention import main as retention_main
+
+# project_tag, который пишет спайдер
+PROJECT_TAG = "scrapy_mvideo_trending"
 
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-MONGO_DB = os.getenv("MONGO_DB", "parsing_hw")
-MONGO_COLLECTION = os.getenv("MONGO_COLLECTION_MVIDEO", "mvideo_trending")
 
 def main():
-    client = MongoClient(MONGO_URI)
-    col = client[MONGO_DB][MONGO_COLLECTION]
+    # порционное удаление по _id (common/retention.py); --resume продолжит прерванное
+    retention_main(["purge", "mvideo", "--filter", f"project_tag={PROJECT_TAG}", *sys.argv[1:]])
 
-    res = col.delete_many({"project_tag": "lesson5_scrapy_mvideo_trending"})
-    print(f"Deleted: {res.deleted_count} documents from {MONGO_DB}.{MONGO_COLLECTION}")
 
 if __name__ == "__main__":
     main()
@@ -1,11 +1,19 @@
+import json
 import os
 import re
+import weakref
 from datetime import datetime
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlsplit
 
 import scrapy
-from pymongo import MongoClient, ASCENDING
+from pymongo import InsertOne, UpdateOne
 from scrapy_playwright.page import PageMethod
+from twisted.internet import defer, task, threads
+
+import repo_root  # noqa: F401  (общий пакет common/ — в корне репозитория)
+from common.extract import Field, format_stats
+from common.metrics import metrics
+from common.mongo import ensure_schema, ensure_timeseries, get_client
 
 
 BASE_URL = "https://www.mvideo.ru/"
@@ -13,15 +21,156 @@ BASE_URL = "https://www.mvideo.ru/"
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 MONGO_DB = os.getenv("MONGO_DB", "parsing_hw")
 MONGO_COLLECTION = os.getenv("MONGO_COLLECTION_MVIDEO", "mvideo_trending")
+MONGO_HISTORY_COLLECTION = os.getenv("MONGO_COLLECTION_MVIDEO_HISTORY", "mvideo_price_history")
 
 PRICE_RE = re.compile(r"(\d[\d\s\xa0]*?)\s*руб", re.IGNORECASE)
 
-
-def abort_request(request) -> bool:
+TRENDING_HREFS = Field("mvideo.trending_hrefs", [
+    # ближайший к заголовку "В тренде" блок, в котором есть ссылки на товары
+    ("nearest_section",
+     '//*[self::h1 or self::h2 or self::h3][contains(normalize-space(.), "В тренде")]'
+     '/ancestor::*[self::section or self::div][.//a[contains(@href, "/products/")]][1]'
+     '//a[contains(@href, "/products/")]/@href'),
+    # старый вариант: первый section/div, содержащий заголовок
+    ("outer_section",
+     '(//*[self::section or self::div]'
+     '[.//*[self::h1 or self::h2 or self::h3][contains(normalize-space(.), "В тренде")]])[1]'
+     '//a[contains(@href, "/products/")]/@href'),
+    ("whole_page", '//a[contains(@href, "/products/")]/@href'),
+])
+PRODUCT_TITLE = Field("mvideo.title", [("h1", "normalize-space(//h1)")])
+
+PRODUCT_JSONLD = Field("mvideo.jsonld", [
+    ("ld_json_scripts", '//script[@type="application/ld+json"]/text()'),
+])
+# встроенное состояние страницы: inline-скрипты с ценами витрины
+PRODUCT_STATE_SCRIPTS = Field("mvideo.state_scripts", [
+    ("inline_sale_price", '//script[not(@src)][contains(., "salePrice")]/text()'),
+])
+STATE_SALE_RE = re.compile(r'"salePrice"\s*:\s*"?(\d+)')
+STATE_BASE_RE = re.compile(r'"basePrice"\s*:\s*"?(\d+)')
+# не разбираем гигантские state-скрипты целиком — цены товара обычно в начале
+STATE_SCAN_LIMIT = 200_000
+
+PRODUCT_ANCHORS_CSS = 'a[href*="/products/"]'
+
+# Вместо фиксированных пауз: скроллим, пока число ссылок на товары растёт.
+# Готово, когда счётчик не меняется stableRounds опросов подряд
+# (или упёрлись в maxScrolls / maxMs). Возвращает статистику ожидания.
+SCROLL_UNTIL_STABLE_JS = """
+async ({selector, pollMs, stableRounds, maxScrolls, maxMs}) => {
+    const started = performance.now();
+    const count = () => document.querySelectorAll(selector).length;
+    let last = count(), stable = 0, scrolls = 0;
+    while (scrolls < maxScrolls && performance.now() - started < maxMs) {
+        window.scrollTo(0, document.body.scrollHeight);
+        scrolls++;
+        await new Promise(r => setTimeout(r, pollMs));
+        const n = count();
+        if (n > 0 && n === last) {
+            if (++stable >= stableRounds) break;
+        } else {
+            stable = 0;
+        }
+        last = n;
+    }
+    return {anchors: count(), scrolls: scrolls, ms: performance.now() - started};
+}
+"""
+
+
+# примерный средний размер ресурса по типу — для оценки сэкономленных байт
+DEFAULT_BLOCK_SIZE_ESTIMATES = {
+    "image": 30_000,
+    "font": 40_000,
+    "media": 500_000,
+    "stylesheet": 25_000,
+    "script": 60_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+    "ping": 500,
+    "other": 2_000,
+}
+
+
+class BlockingPolicy:
     """
-    Ускоряем загрузку: не тянем картинки/шрифты/медиа.
+    Правила блокировки запросов Playwright (PLAYWRIGHT_ABORT_REQUEST).
+
+    По порядку:
+    1) URL из allow-паттернов не блокируем никогда;
+    2) блокируем типы ресурсов из block_resource_types;
+    3) блокируем URL из deny-паттернов (аналитика, реклама, трекинг);
+    4) со сторонних доменов (не first_party_domains) пропускаем только документы.
+
+    Настраивается из настроек спайдера (MVIDEO_BLOCK_*), считает
+    заблокированные запросы и оценку сэкономленных байт в статистику краулера.
     """
-    return request.resource_type in {"image", "font", "media"}
+
+    def __init__(self):
+        self.block_resource_types = {"image", "font", "media"}
+        self.first_party_domains: list[str] = []
+        self.deny_patterns: list[re.Pattern] = []
+        self.allow_patterns: list[re.Pattern] = []
+        self.size_estimates = dict(DEFAULT_BLOCK_SIZE_ESTIMATES)
+        self.stats = None
+        # страница Playwright -> [заблокировано, байт]; слабые ключи: запись уходит вместе со страницей
+        self.page_counts: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def configure(self, settings, stats) -> None:
+        self.block_resource_types = set(settings.getlist("MVIDEO_BLOCK_RESOURCE_TYPES"))
+        self.first_party_domains = settings.getlist("MVIDEO_FIRST_PARTY_DOMAINS")
+        self.deny_patterns = [re.compile(p) for p in settings.getlist("MVIDEO_BLOCK_URL_PATTERNS")]
+        self.allow_patterns = [re.compile(p) for p in settings.getlist("MVIDEO_ALLOW_URL_PATTERNS")]
+        self.size_estimates.update(settings.getdict("MVIDEO_BLOCK_SIZE_ESTIMATES"))
+        self.stats = stats
+
+    def _is_first_party(self, url: str) -> bool:
+        if not self.first_party_domains:
+            return True
+        host = urlsplit(url).hostname or ""
+        return any(host == d or host.endswith("." + d) for d in self.first_party_domains)
+
+    def reason(self, url: str, resource_type: str) -> str | None:
+        if any(p.search(url) for p in self.allow_patterns):
+            return None
+        if resource_type in self.block_resource_types:
+            return f"type_{resource_type}"
+        if any(p.search(url) for p in self.deny_patterns):
+            return "deny_pattern"
+        if resource_type != "document" and not self._is_first_party(url):
+            return "third_party"
+        return None
+
+    def _page(self, request):
+        try:
+            return request.frame.page
+        except Exception:  # запросы service worker-ов без frame
+            return None
+
+    def __call__(self, request) -> bool:
+        reason = self.reason(request.url, request.resource_type)
+        if reason is None:
+            return False
+        est = self.size_estimates.get(request.resource_type, self.size_estimates["other"])
+        if self.stats is not None:
+            self.stats.inc_value("mvideo/blocked/count")
+            self.stats.inc_value(f"mvideo/blocked/{reason}")
+            self.stats.inc_value("mvideo/blocked/bytes_saved_est", est)
+        page = self._page(request)
+        if page is not None:
+            counts = self.page_counts.setdefault(page, [0, 0])
+            counts[0] += 1
+            counts[1] += est
+        return True
+
+    def pop_page_counts(self, page) -> tuple[int, int]:
+        """(заблокировано запросов, оценка сэкономленных байт) для страницы."""
+        blocked, saved = self.page_counts.pop(page, (0, 0))
+        return blocked, saved
+
+
+abort_request = BlockingPolicy()
 
 
 def _to_int_price(s: str) -> int | None:
@@ -48,25 +197,239 @@ def extract_prices_from_html(html_text: str) -> list[int]:
     return uniq
 
 
+def _price_value(v) -> int | None:
+    if v is None:
+        return None
+    try:
+        return int(float(str(v).replace("\xa0", "").replace(" ", "").replace(",", ".")))
+    except ValueError:
+        return None
+
+
+def _iter_jsonld_offers(node):
+    """Все Offer/AggregateOffer из JSON-LD (dict, list, @graph, Product.offers)."""
+    if isinstance(node, list):
+        for x in node:
+            yield from _iter_jsonld_offers(x)
+    elif isinstance(node, dict):
+        types = node.get("@type")
+        types = types if isinstance(types, list) else [types]
+        if "Offer" in types or "AggregateOffer" in types:
+            yield node
+        for key in ("@graph", "offers"):
+            if key in node:
+                yield from _iter_jsonld_offers(node[key])
+
+
+def extract_prices_from_jsonld(scripts: list[str]) -> tuple[int | None, int | None]:
+    """
+    (текущая, старая) из JSON-LD Offer. Старая — priceSpecification
+    с типом StrikethroughPrice/ListPrice, если сайт её отдаёт.
+    """
+    for text in scripts:
+        try:
+            data = json.loads(text)
+        except ValueError:
+            continue
+        for offer in _iter_jsonld_offers(data):
+            current = _price_value(offer.get("price") or offer.get("lowPrice"))
+            if current is None:
+                continue
+            old = None
+            specs = offer.get("priceSpecification") or []
+            for spec in specs if isinstance(specs, list) else [specs]:
+                if isinstance(spec, dict) and any(
+                    t in str(spec.get("priceType", "")) for t in ("StrikethroughPrice", "ListPrice")
+                ):
+                    old = _price_value(spec.get("price"))
+            return current, old
+    return None, None
+
+
+def extract_prices_from_state(scripts: list[str]) -> tuple[int | None, int | None]:
+    """(текущая, старая) из встроенного state: salePrice / basePrice."""
+    for text in scripts:
+        head = text[:STATE_SCAN_LIMIT]
+        sale = STATE_SALE_RE.search(head)
+        if not sale:
+            continue
+        base = STATE_BASE_RE.search(head)
+        current = int(sale.group(1))
+        old = int(base.group(1)) if base else None
+        return current, (old if old != current else None)
+    return None, None
+
+
+def extract_product_prices(root, html_text: str) -> tuple[int | None, int | None, str | None]:
+    """
+    Цены товара: JSON-LD -> встроенный state -> regex по всей странице (fallback).
+    Третий элемент — откуда взята цена ("jsonld" / "state" / "regex" / None).
+    """
+    current, old = extract_prices_from_jsonld(PRODUCT_JSONLD.extract(root, default=[]))
+    if current is not None:
+        return current, old, "jsonld"
+
+    current, old = extract_prices_from_state(PRODUCT_STATE_SCRIPTS.extract(root, default=[]))
+    if current is not None:
+        return current, old, "state"
+
+    prices = extract_prices_from_html(html_text)
+    if prices:
+        return prices[0], (prices[1] if len(prices) >= 2 else None), "regex"
+    return None, None, None
+
+
 class MongoPipeline:
+    """
+    Запись в Mongo не блокирует реактор: операции копятся в буфере и уходят
+    unordered bulk_write-пачками в пуле потоков (deferToThread).
+
+    Пишем только при изменении цены: последние цены товаров держим в памяти
+    (подгружаются одним запросом из "latest"-коллекции; новая цена попадает
+    в latest только после успешной записи её пачки). Если цена изменилась
+    (или товар новый) — добавляем точку в time-series историю и обновляем
+    компактный latest-документ; если нет — пачкой обновляем только last_seen
+    (по нему TTL: товар, пропавший из выдачи, со временем удаляется).
+
+    Сброс — по размеру пачки или по таймеру. Если в буфере и в полёте
+    набралось max_buffer операций, process_item возвращает Deferred,
+    и Scrapy ждёт, пока пачки не запишутся (backpressure).
+    """
+
+    def __init__(self, batch_size: int = 100, flush_interval: float = 2.0, max_buffer: int = 1000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        s = crawler.settings
+        return cls(
+            batch_size=s.getint("MVIDEO_MONGO_BATCH_SIZE", 100),
+            flush_interval=s.getfloat("MVIDEO_MONGO_FLUSH_INTERVAL", 2.0),
+            max_buffer=s.getint("MVIDEO_MONGO_MAX_BUFFER", 1000),
+        )
+
+    @staticmethod
+    def product_key(doc: dict) -> str:
+        return doc.get("product_id") or doc["url"]
+
     def open_spider(self, spider):
-        self.client = MongoClient(MONGO_URI)
-        self.col = self.client[MONGO_DB][MONGO_COLLECTION]
-        self.col.create_index([("url", ASCENDING)], unique=True)
-        self.col.create_index([("product_id", ASCENDING)])
-        self.col.create_index([("scraped_at", ASCENDING)])
+        db = get_client(MONGO_URI)[MONGO_DB]
+        self.col = db[MONGO_COLLECTION]
+        ensure_schema(self.col, schema="mvideo_trending")
+        self.history = ensure_timeseries(db, MONGO_HISTORY_COLLECTION, "ts", "product_id")
+        ensure_schema(self.history, schema="mvideo_price_history")
+
+        # последние известные цены: product_id|url -> (текущая, старая)
+        self.latest = {
+            self.product_key(d): (d.get("price_current_rub"), d.get("price_old_rub"))
+            for d in self.col.find(
+                {}, {"_id": 0, "url": 1, "product_id": 1, "price_current_rub": 1, "price_old_rub": 1}
+            )
+        }
+
+        self.buffer: list[UpdateOne] = []
+        self.history_buffer: list[InsertOne] = []
+        self.unchanged: list[str] = []
+        # цены, ещё не подтверждённые записью: в буфере (batch_prices) и в буфере + в полёте (pending_prices)
+        self.batch_prices: dict[str, tuple] = {}
+        self.pending_prices: dict[str, tuple] = {}
+        self.in_flight: dict[defer.Deferred, int] = {}
+        self.spider = spider
+        self.stats = spider.crawler.stats
+        self.timer = task.LoopingCall(self.flush)
+        self.timer.start(self.flush_interval, now=False)
 
     def close_spider(self, spider):
-        self.client.close()
+        if self.timer.running:
+            self.timer.stop()
+        # клиент общий для процесса (реестр common.mongo) — его не закрываем
+        return defer.DeferredList([self.flush(), *self.in_flight])
+
+    def _write(self, ops: list[UpdateOne], history_ops: list[InsertOne], unchanged: list[str]):
+        with metrics.timer("stage_seconds", scraper=self.spider.name, stage="db_write"):
+            if history_ops:
+                self.history.bulk_write(history_ops, ordered=False)
+            if ops:
+                self.col.bulk_write(ops, ordered=False)
+            if unchanged:
+                self.col.update_many({"url": {"$in": unchanged}}, {"$set": {"last_seen": datetime.utcnow()}})
+
+    def pending(self) -> int:
+        return len(self.buffer) + len(self.history_buffer) + len(self.unchanged)
+
+    def flush(self) -> defer.Deferred:
+        if not self.pending():
+            return defer.succeed(None)
+        ops, self.buffer = self.buffer, []
+        history_ops, self.history_buffer = self.history_buffer, []
+        unchanged, self.unchanged = self.unchanged, []
+        batch_prices, self.batch_prices = self.batch_prices, {}
+        d = threads.deferToThread(self._write, ops, history_ops, unchanged)
+        self.in_flight[d] = len(ops) + len(history_ops) + len(unchanged)
+
+        def done(result):
+            self.in_flight.pop(d, None)
+            return result
+
+        def written(result):
+            self.latest.update(batch_prices)
+            self._settle(batch_prices)
+            return result
+
+        def failed(f):
+            # latest не трогаем: следующий item с той же ценой снова уйдёт в запись
+            self._settle(batch_prices)
+            self.stats.inc_value("mvideo/db/failed_batches")
+            self.spider.logger.error("Mongo bulk_write failed: %r", f.value)
+
+        d.addBoth(done)
+        d.addCallbacks(written, failed)
+        return d
+
+    def _settle(self, batch_prices: dict[str, tuple]) -> None:
+        for key, prices in batch_prices.items():
+            # более новая цена того же товара могла уже встать в следующую пачку
+            if self.pending_prices.get(key) == prices:
+                del self.pending_prices[key]
 
     def process_item(self, item, spider):
         item = dict(item)
+        key = self.product_key(item)
+        prices = (item.get("price_current_rub"), item.get("price_old_rub"))
+        known = self.pending_prices[key] if key in self.pending_prices else self.latest.get(key)
+        if known == prices:
+            self.unchanged.append(item["url"])
+            self.stats.inc_value("mvideo/db/unchanged")
+            if len(self.unchanged) >= self.batch_size:
+                self.flush()
+            return item
+
+        self.pending_prices[key] = self.batch_prices[key] = prices
+        self.stats.inc_value("mvideo/db/changed")
+        self.history_buffer.append(InsertOne({
+            "ts": item["scraped_at"],
+            "product_id": key,
+            "url": item["url"],
+            "price_current_rub": prices[0],
+            "price_old_rub": prices[1],
+        }))
+        item["last_seen"] = item["scraped_at"]
         # upsert по url, чтобы при повторах не плодить дубли
-        self.col.update_one(
+        self.buffer.append(UpdateOne(
             {"url": item["url"]},
             {"$set": item, "$setOnInsert": {"created_at": datetime.utcnow()}},
             upsert=True,
-        )
+        ))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+        if self.pending() + sum(self.in_flight.values()) >= self.max_buffer:
+            # буфер полон: отдаём item только после записи текущих пачек
+            d = defer.DeferredList([self.flush(), *self.in_flight])
+            d.addCallback(lambda _: item)
+            return d
         return item
 
 
@@ -86,31 +449,68 @@ class MvideoTrendingSpider(scrapy.Spider):
         "PLAYWRIGHT_DEFAULT_TIMEOUT": 60000,
 
         "PLAYWRIGHT_ABORT_REQUEST": abort_request,
+        # правила BlockingPolicy; ссылки a[href*="/products/"] рендерит JS
+        # с первого домена, поэтому CSS и сторонние скрипты можно не грузить
+        "MVIDEO_BLOCK_RESOURCE_TYPES": ["image", "font", "media", "stylesheet"],
+        "MVIDEO_FIRST_PARTY_DOMAINS": ["mvideo.ru"],
+        "MVIDEO_BLOCK_URL_PATTERNS": [
+            r"google-analytics\.com", r"googletagmanager\.com", r"doubleclick\.net",
+            r"mc\.yandex\.ru", r"yandex\.ru/(metrika|ads)", r"top-fwz1\.mail\.ru",
+            r"criteo\.", r"vk\.com/rtrg", r"/(analytics|tracking|beacon|pixel)[/.?]",
+        ],
+        "MVIDEO_ALLOW_URL_PATTERNS": [],
+        "MVIDEO_BLOCK_SIZE_ESTIMATES": {},
+
+        # готовность страницы: опрос каждые POLL_MS, стоп после STABLE_ROUNDS
+        # одинаковых замеров или по лимитам MAX_SCROLLS / MAX_MS
+        "MVIDEO_READY_POLL_MS": 300,
+        "MVIDEO_READY_STABLE_ROUNDS": 2,
+        "MVIDEO_READY_MAX_SCROLLS": 10,
+        "MVIDEO_READY_MAX_MS": 15000,
+
+        # карточки товаров качаем обычным HTTP; в браузер — только если
+        # в HTML не нашлось заголовка или цены
+        "MVIDEO_RENDER_FALLBACK": True,
 
         "ITEM_PIPELINES": {__name__ + ".MongoPipeline": 300},
+        # тайминги по этапам; включается SCRAPER_METRICS=1 (см. common/metrics.py)
+        "EXTENSIONS": {"common.metrics.ScrapyMetrics": 0},
+        "MVIDEO_MONGO_BATCH_SIZE": 100,
+        "MVIDEO_MONGO_FLUSH_INTERVAL": 2.0,
+        "MVIDEO_MONGO_MAX_BUFFER": 1000,
         "LOG_LEVEL": "INFO",
         "ROBOTSTXT_OBEY": True,
         "DOWNLOAD_TIMEOUT": 90,
         "RETRY_TIMES": 2,
     }
 
+    def readiness_page_methods(self) -> list[PageMethod]:
+        settings = self.settings
+        return [
+            PageMethod("wait_for_load_state", "domcontentloaded"),
+            PageMethod("wait_for_selector", PRODUCT_ANCHORS_CSS, timeout=60000),
+            PageMethod("evaluate", SCROLL_UNTIL_STABLE_JS, {
+                "selector": PRODUCT_ANCHORS_CSS,
+                "pollMs": settings.getint("MVIDEO_READY_POLL_MS"),
+                "stableRounds": settings.getint("MVIDEO_READY_STABLE_ROUNDS"),
+                "maxScrolls": settings.getint("MVIDEO_READY_MAX_SCROLLS"),
+                "maxMs": settings.getint("MVIDEO_READY_MAX_MS"),
+            }),
+        ]
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        abort_request.configure(crawler.settings, crawler.stats)
+        return spider
+
     async def start(self):
         yield scrapy.Request(
             BASE_URL,
             meta={
                 "playwright": True,
                 "playwright_include_page": True,
-                "playwright_page_methods": [
-                    PageMethod("wait_for_load_state", "domcontentloaded"),
-                    PageMethod("wait_for_timeout", 1500),
-
-                    PageMethod("evaluate", "window.scrollTo(0, document.body.scrollHeight)"),
-                    PageMethod("wait_for_timeout", 1500),
-                    PageMethod("evaluate", "window.scrollTo(0, document.body.scrollHeight)"),
-                    PageMethod("wait_for_timeout", 1500),
-
-                    PageMethod("wait_for_selector", 'a[href*="/products/"]', timeout=60000),
-                ],
+                "playwright_page_methods": self.readiness_page_methods(),
             },
             callback=self.parse_home,
             errback=self.errback_close_page,
@@ -123,25 +523,38 @@ class MvideoTrendingSpider(scrapy.Spider):
         """
         page = failure.request.meta.get("playwright_page")
         if page:
+            abort_request.pop_page_counts(page)
             await page.close()
         self.logger.error("Request failed: %r", failure)
 
+    def record_readiness(self, response):
+        """Сколько ждали готовности страницы — в лог и в статистику краулера."""
+        ready = response.meta["playwright_page_methods"][-1].result or {}
+        stats = self.crawler.stats
+        stats.set_value("mvideo/ready_ms", round(ready.get("ms", 0)))
+        stats.set_value("mvideo/ready_scrolls", ready.get("scrolls", 0))
+        stats.set_value("mvideo/ready_anchors", ready.get("anchors", 0))
+        self.logger.info(
+            "Page ready in %.0f ms (scrolls=%s, product anchors=%s, download latency %.2fs)",
+            ready.get("ms", 0), ready.get("scrolls"), ready.get("anchors"),
+            response.meta.get("download_latency", 0.0),
+        )
+
     async def parse_home(self, response):
         page = response.meta.get("playwright_page")
         if page:
+            blocked, saved = abort_request.pop_page_counts(page)
+            self.logger.info("Blocked %d requests on page, ~%d KiB saved", blocked, saved // 1024)
             await page.close()
 
-        section = response.xpath(
-            '//*[self::section or self::div]'
-            '[.//*[self::h1 or self::h2 or self::h3][contains(normalize-space(.), "В тренде")]]'
-        )
-        root = section[0] if section else response
-        if section:
-            self.logger.info('Found section "В тренде"')
-        else:
-            self.logger.warning('Section "В тренде" not found, fallback to whole page')
+        self.record_readiness(response)
 
-        hrefs = root.xpath('.//a[contains(@href, "/products/")]/@href').getall()
+        with metrics.timer("stage_seconds", scraper=self.name, stage="parse"):
+            label, hrefs = TRENDING_HREFS.extract_labeled(response.selector.root, default=[])
+        if label in (None, "whole_page"):
+            self.logger.warning('Section "В тренде" not found, fallback to whole page')
+        else:
+            self.logger.info('Found section "В тренде" (%s)', label)
 
         urls = []
         seen = set()
@@ -155,20 +568,56 @@ class MvideoTrendingSpider(scrapy.Spider):
         self.logger.info("Product links extracted: %d", len(urls))
 
         # Ограничим число товаров для ДЗ
+        # без meta["playwright"] обработчик scrapy-playwright качает обычным HTTP
         for u in urls[:30]:
             yield scrapy.Request(u, callback=self.parse_product)
 
+    def closed(self, reason):
+        self.logger.info("Selector stats:\n%s", format_stats())
+
+    def render_product_request(self, response) -> scrapy.Request:
+        """Повторный запрос карточки через Playwright, когда HTTP-версии не хватило."""
+        return response.request.replace(
+            meta={
+                **response.request.meta,
+                "playwright": True,
+                "playwright_page_methods": [
+                    PageMethod("wait_for_selector", "h1", timeout=30000),
+                ],
+                "mvideo_rendered": True,
+            },
+            dont_filter=True,
+        )
+
     def parse_product(self, response):
-        title = response.xpath("normalize-space(//h1)").get() or ""
         url = response.url
+        rendered = response.meta.get("mvideo_rendered", False)
+        stats = self.crawler.stats
 
         # product_id часто в конце после дефиса
         m = re.search(r"-([0-9]{6,})/?$", url)
         product_id = m.group(1) if m else None
 
-        prices = extract_prices_from_html(response.text)
-        current_price = prices[0] if len(prices) >= 1 else None
-        old_price = prices[1] if len(prices) >= 2 else None
+        with metrics.timer("stage_seconds", scraper=self.name, stage="parse"):
+            title = PRODUCT_TITLE.extract(response.selector.root, default="")
+            current_price, old_price, price_source = extract_product_prices(
+                response.selector.root, response.text
+            )
+
+        # regex по всей странице ловит любое "N руб" (рассрочка, аксессуары) —
+        # на HTTP-проходе такая цена не считается найденной, идём в рендер
+        price_found = current_price is not None and (rendered or price_source != "regex")
+        complete = bool(title) and price_found
+        if rendered:
+            stats.inc_value("mvideo/product/rendered")
+            if not complete:
+                stats.inc_value("mvideo/product/rendered_incomplete")
+        else:
+            stats.inc_value("mvideo/product/http")
+            if not complete and self.settings.getbool("MVIDEO_RENDER_FALLBACK"):
+                stats.inc_value("mvideo/product/escalated")
+                yield self.render_product_request(response)
+                return
 
         yield {
             "source": "mvideo.ru",
@@ -178,6 +627,8 @@ class MvideoTrendingSpider(scrapy.Spider):
             "product_id": product_id,
             "price_current_rub": current_price,
             "price_old_rub": old_price,
+            "price_source": price_source,
+            "rendered": rendered,
             "scraped_at": datetime.utcnow(),
             "project_tag": "scrapy_mvideo_trending",
         }
@@ -0,0 +1,73 @@
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import task
+
+from books.middlewares import SplashPoolMiddleware
+
+
+class SplashConcurrencyController:
+    """
+    Подстраивает число одновременных рендеров на каждом Splash-инстансе (AIMD).
+
+    Раз в SPLASH_CC_INTERVAL секунд смотрим по каждому инстансу пула:
+    - доля ошибок за интервал > SPLASH_CC_MAX_ERROR_RATE или EWMA рендера
+      > SPLASH_CC_TARGET_LATENCY -> лимит делим пополам;
+    - иначе, если инстанс был загружен под лимит, -> лимит + 1.
+    Лимит держим в [SPLASH_CC_MIN, SPLASH_CC_MAX] и применяем и к выбору
+    инстанса в SplashPoolMiddleware, и к concurrency его download slot.
+    """
+
+    def __init__(self, crawler):
+        s = crawler.settings
+        if not s.getbool("SPLASH_CC_ENABLED", True):
+            raise NotConfigured
+        self.crawler = crawler
+        self.interval = s.getfloat("SPLASH_CC_INTERVAL", 5.0)
+        self.target_latency = s.getfloat("SPLASH_CC_TARGET_LATENCY", 5.0)
+        self.max_error_rate = s.getfloat("SPLASH_CC_MAX_ERROR_RATE", 0.2)
+        self.min_limit = s.getint("SPLASH_CC_MIN", 1)
+        self.max_limit = s.getint("SPLASH_CC_MAX", 16)
+        self.pool: SplashPoolMiddleware | None = None
+        self.last: dict[str, tuple[int, int]] = {}
+        self.timer = task.LoopingCall(self.adjust)
+
+        crawler.signals.connect(self.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(self.spider_closed, signal=signals.spider_closed)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def spider_opened(self, spider):
+        middlewares = self.crawler.engine.downloader.middleware.middlewares
+        self.pool = next((m for m in middlewares if isinstance(m, SplashPoolMiddleware)), None)
+        if self.pool is None:
+            spider.logger.warning("SplashConcurrencyController: SplashPoolMiddleware is not enabled")
+            return
+        self.timer.start(self.interval, now=False)
+
+    def spider_closed(self, spider):
+        if self.timer.running:
+            self.timer.stop()
+
+    def adjust(self):
+        slots = self.crawler.engine.downloader.slots
+        stats = self.crawler.stats
+        for endpoint in self.pool.endpoints.values():
+            prev_ok, prev_err = self.last.get(endpoint.url, (0, 0))
+            ok, err = endpoint.ok - prev_ok, endpoint.errors - prev_err
+            self.last[endpoint.url] = (endpoint.ok, endpoint.errors)
+
+            done = ok + err
+            if done == 0:
+                continue
+            if err / done > self.max_error_rate or endpoint.latency > self.target_latency:
+                endpoint.limit = max(self.min_limit, endpoint.limit // 2)
+            elif endpoint.inflight >= endpoint.limit - 1:
+                endpoint.limit = min(self.max_limit, endpoint.limit + 1)
+
+            slot = slots.get(SplashPoolMiddleware.slot_key(endpoint))
+            if slot is not None:
+                slot.concurrency = endpoint.limit
+            stats.set_value(f"splash_cc/{endpoint.url}/limit", endpoint.limit)
+            stats.set_value(f"splash_cc/{endpoint.url}/latency_ms", round(endpoint.latency * 1000))
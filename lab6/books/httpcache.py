@@ -0,0 +1,135 @@
+import hashlib
+import json
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+from scrapy.utils.project import data_path
+from scrapy.utils.request import fingerprint
+
+try:
+    import zstandard
+except ImportError:  # zstd — опционально, без него сжимаем zlib
+    zstandard = None
+
+
+def _compress(body: bytes) -> tuple[bytes, str]:
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=6).compress(body), "zstd"
+    return zlib.compress(body, 6), "zlib"
+
+
+def _decompress(blob: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompress(blob)
+    return zlib.decompress(blob)
+
+
+def cache_key(request) -> tuple[str, str]:
+    """
+    (ключ, URL страницы). Для Splash-запросов ключ строится по аргументам
+    рендера, а не по URL инстанса — иначе пул Splash давал бы промахи кэша.
+    """
+    splash = request.meta.get("splash")
+    if splash:
+        args = splash.get("args", {})
+        raw = json.dumps([splash.get("endpoint"), args], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest(), args.get("url", request.url)
+    return fingerprint(request).hex(), request.url
+
+
+class SqliteRenderCacheStorage:
+    """
+    HTTPCACHE_STORAGE: все ответы (в том числе отрендеренные Splash) в одном
+    sqlite-файле, тела сжаты zstd (или zlib, если zstandard не установлен).
+
+    Записи старше HTTPCACHE_EXPIRATION_SECS не отдаются и удаляются при
+    открытии спайдера. Файл: HTTPCACHE_DIR/<spider>.sqlite.
+    """
+
+    def __init__(self, settings):
+        self.cachedir = data_path(settings["HTTPCACHE_DIR"], createdir=True)
+        self.expiration_secs = settings.getint("HTTPCACHE_EXPIRATION_SECS")
+        self.db = None
+
+    @staticmethod
+    def path_for(cachedir: str, spider_name: str) -> Path:
+        return Path(cachedir) / f"{spider_name}.sqlite"
+
+    def open_spider(self, spider):
+        self.db = sqlite3.connect(self.path_for(self.cachedir, spider.name))
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " page_url TEXT NOT NULL,"
+            " url TEXT NOT NULL,"
+            " rendered INTEGER NOT NULL,"
+            " status INTEGER NOT NULL,"
+            " headers TEXT NOT NULL,"
+            " body BLOB NOT NULL,"
+            " codec TEXT NOT NULL,"
+            " stored_at REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_stored_at ON responses(stored_at)")
+        if self.expiration_secs > 0:
+            self.db.execute("DELETE FROM responses WHERE stored_at < ?", (time.time() - self.expiration_secs,))
+        self.db.commit()
+
+    def close_spider(self, spider):
+        self.db.close()
+
+    def retrieve_response(self, spider, request):
+        key, _ = cache_key(request)
+        row = self.db.execute(
+            "SELECT url, status, headers, body, codec, stored_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        url, status, headers, body, codec, stored_at = row
+        if 0 < self.expiration_secs < time.time() - stored_at:
+            return None
+        headers = Headers(json.loads(headers))
+        body = _decompress(body, codec)
+        respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+        return respcls(url=url, headers=headers, status=status, body=body)
+
+    def store_response(self, spider, request, response):
+        key, page_url = cache_key(request)
+        body, codec = _compress(response.body)
+        headers = {k.decode("latin1"): [v.decode("latin1") for v in vs] for k, vs in response.headers.items()}
+        self.db.execute(
+            "INSERT OR REPLACE INTO responses"
+            " (key, page_url, url, rendered, status, headers, body, codec, stored_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                key, page_url, response.url, int("splash" in request.meta), response.status,
+                json.dumps(headers), body, codec, time.time(),
+            ),
+        )
+        self.db.commit()
+
+
+def iter_cached_pages(path: Path, url_contains: str = ""):
+    """
+    (page_url, rendered, html bytes) из файла кэша — для офлайн-replay.
+    По одной записи на страницу: у одной книги бывают и HTTP-ответ, и рендер
+    Splash — берём рендер, а среди равных самый свежий.
+    """
+    db = sqlite3.connect(path)
+    try:
+        rows = db.execute(
+            "SELECT r.page_url, r.rendered, r.body, r.codec FROM responses r JOIN ("
+            "  SELECT key, ROW_NUMBER() OVER ("
+            "    PARTITION BY page_url ORDER BY rendered DESC, stored_at DESC) AS rn"
+            "  FROM responses WHERE status = 200 AND page_url LIKE ?"
+            ") latest ON latest.key = r.key"
+            " WHERE latest.rn = 1 ORDER BY r.stored_at",
+            (f"%{url_contains}%",),
+        )
+        for page_url, rendered, body, codec in rows:
+            yield page_url, bool(rendered), _decompress(body, codec)
+    finally:
+        db.close()
@@ -0,0 +1,151 @@
+import time
+from urllib.parse import urlsplit
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+
+class SplashEndpoint:
+    def __init__(self, url: str, limit: int):
+        self.url = url.rstrip("/")
+        self.limit = limit           # потолок одновременных рендеров (его двигает SplashConcurrencyController)
+        self.assigned = 0           # назначены на инстанс и ещё не завершились (включая ожидание в слоте)
+        self.inflight = 0           # реально отправлены в Splash (вышли из очереди download slot)
+        self.ok = 0
+        self.errors = 0
+        self.latency = 1.0          # EWMA времени рендера (download_latency, без очереди), сек
+        self.consecutive_errors = 0
+        self.down_until = 0.0
+
+    def healthy(self, now: float) -> bool:
+        # после cooldown инстанс снова получает запросы (пробный режим)
+        return now >= self.down_until
+
+
+class SplashPoolMiddleware:
+    """
+    Раскидывает SplashRequest-ы по пулу Splash-инстансов (SPLASH_URLS).
+
+    - выбираем здоровый инстанс с минимальной оценкой (assigned + 1) * latency;
+    - каждому инстансу свой download slot, его concurrency (DOWNLOAD_SLOTS,
+      дальше — SplashConcurrencyController) ограничивает одновременные рендеры;
+    - после SPLASH_POOL_ERROR_THRESHOLD ошибок подряд инстанс выводится из пула
+      на SPLASH_POOL_COOLDOWN секунд, ретраи уходят на другие инстансы.
+
+    Стоит перед scrapy_splash.SplashMiddleware (725): первый проход запроса
+    выбирает splash_url, второй (уже переписанный запрос к Splash) считает
+    assigned и при необходимости перенаправляет на другой инстанс. inflight
+    считается по сигналам request_reached/left_downloader (только запросы,
+    вышедшие из очереди слота), latency — по download_latency ответа:
+    очередь в слоте не должна выглядеть как медленный рендер.
+    """
+
+    def __init__(self, urls: list[str], max_inflight: int, error_threshold: int, cooldown: float, stats):
+        self.endpoints = {e.url: e for e in (SplashEndpoint(u, max_inflight) for u in urls)}
+        self.error_threshold = error_threshold
+        self.cooldown = cooldown
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        s = crawler.settings
+        urls = s.getlist("SPLASH_URLS")
+        if not urls:
+            raise NotConfigured("SPLASH_URLS is empty")
+        mw = cls(
+            urls=urls,
+            max_inflight=s.getint("SPLASH_POOL_MAX_INFLIGHT", 4),
+            error_threshold=s.getint("SPLASH_POOL_ERROR_THRESHOLD", 3),
+            cooldown=s.getfloat("SPLASH_POOL_COOLDOWN", 30.0),
+            stats=crawler.stats,
+        )
+        crawler.signals.connect(mw.request_reached_downloader, signal=signals.request_reached_downloader)
+        crawler.signals.connect(mw.request_left_downloader, signal=signals.request_left_downloader)
+        return mw
+
+    def choose(self, exclude: str | None = None) -> SplashEndpoint:
+        now = time.monotonic()
+        candidates = [e for e in self.endpoints.values() if e.healthy(now) and e.url != exclude]
+        if not candidates:
+            # все лежат — берём тот, что поднимется раньше всех
+            candidates = sorted(self.endpoints.values(), key=lambda e: e.down_until)[:1]
+        free = [e for e in candidates if e.assigned < e.limit] or candidates
+        return min(free, key=lambda e: (e.assigned + 1) * e.latency)
+
+    @staticmethod
+    def slot_key(endpoint: SplashEndpoint) -> str:
+        return "splash:" + urlsplit(endpoint.url).netloc
+
+    def process_request(self, request, spider):
+        splash = request.meta.get("splash")
+        if splash is None:
+            return None
+
+        if not request.meta.get("_splash_processed"):
+            # первый проход: выбираем инстанс, SplashMiddleware подставит его URL
+            endpoint = self.choose()
+            splash["splash_url"] = endpoint.url
+            request.meta["splash_pool_endpoint"] = endpoint.url
+            return None
+
+        endpoint = self.endpoints.get(request.meta.get("splash_pool_endpoint"))
+        if endpoint is None:
+            return None
+        if not endpoint.healthy(time.monotonic()):
+            # ретрай к упавшему инстансу — перенаправляем на другой
+            other = self.choose(exclude=endpoint.url)
+            if other is not endpoint:
+                self.stats.inc_value("splash_pool/rerouted")
+                meta = dict(request.meta, splash_pool_endpoint=other.url)
+                meta["splash"] = dict(meta["splash"], splash_url=other.url)
+                return request.replace(url=other.url + request.url[len(endpoint.url):], meta=meta)
+
+        request.meta["download_slot"] = self.slot_key(endpoint)
+        request.meta["splash_pool_assigned"] = True
+        endpoint.assigned += 1
+        self.stats.inc_value(f"splash_pool/{endpoint.url}/requests")
+        return None
+
+    def request_reached_downloader(self, request, spider):
+        # запрос вышел из очереди слота и реально ушёл в Splash
+        endpoint = self.endpoints.get(request.meta.get("splash_pool_endpoint"))
+        if endpoint is None or not request.meta.get("splash_pool_assigned"):
+            return
+        request.meta["splash_pool_dispatched"] = True
+        endpoint.inflight += 1
+        self.stats.max_value(f"splash_pool/{endpoint.url}/max_inflight", endpoint.inflight)
+
+    def request_left_downloader(self, request, spider):
+        endpoint = self.endpoints.get(request.meta.get("splash_pool_endpoint"))
+        if endpoint is not None and request.meta.pop("splash_pool_dispatched", False):
+            endpoint.inflight = max(0, endpoint.inflight - 1)
+
+    def _finish(self, request, ok: bool) -> None:
+        assigned = request.meta.pop("splash_pool_assigned", False)
+        endpoint = self.endpoints.get(request.meta.get("splash_pool_endpoint"))
+        if not assigned or endpoint is None:
+            return
+        endpoint.assigned = max(0, endpoint.assigned - 1)
+        if ok:
+            endpoint.ok += 1
+            latency = request.meta.get("download_latency")
+            if latency is not None:
+                endpoint.latency = 0.8 * endpoint.latency + 0.2 * latency
+            endpoint.consecutive_errors = 0
+            return
+        endpoint.errors += 1
+        endpoint.consecutive_errors += 1
+        self.stats.inc_value(f"splash_pool/{endpoint.url}/errors")
+        if endpoint.consecutive_errors >= self.error_threshold:
+            endpoint.down_until = time.monotonic() + self.cooldown
+            endpoint.consecutive_errors = 0
+            self.stats.inc_value(f"splash_pool/{endpoint.url}/marked_down")
+
+    def process_response(self, request, response, spider):
+        # 502/503/504 — Splash перегружен или упал; 4xx от сайта — не вина инстанса
+        self._finish(request, ok=response.status not in (502, 503, 504))
+        return response
+
+    def process_exception(self, request, exception, spider):
+        self._finish(request, ok=False)
+        return None
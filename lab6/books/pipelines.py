@@ -1,31 +1,82 @@
+import hashlib
+import json
 import os
-from pymongo import MongoClient, ASCENDING
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+import repo_root  # noqa: F401  (общий пакет common/ — в корне репозитория)
+from common.metrics import metrics
+from common.mongo import ensure_schema, get_client
+
+# поля, изменение которых считается изменением книги (scraped_at не в счёт)
+FINGERPRINT_FIELDS = ("title", "authors", "price_base", "price_discount", "rating")
+
+
+def book_fingerprint(doc: dict) -> str:
+    payload = json.dumps([doc.get(f) for f in FINGERPRINT_FIELDS], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
 
 
 class MongoPipeline:
-    def __init__(self):
+    """
+    Пишем только изменения. Отпечатки (fingerprint) всех книг грузим одним
+    запросом при старте; изменённые/новые книги уходят bulk_write-пачками,
+    у неизменённых пачкой обновляется только last_seen.
+    """
+
+    def __init__(self, batch_size: int = 100):
         self.mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017")
         self.mongo_db = os.getenv("MONGO_DB", "parsing_hw")
         self.mongo_collection = os.getenv("MONGO_COLLECTION_BOOKS", "books_labirint")
+        self.batch_size = batch_size
 
     @classmethod
     def from_crawler(cls, crawler):
-        return cls()
+        pipe = cls(batch_size=crawler.settings.getint("BOOKS_MONGO_BATCH_SIZE", 100))
+        pipe.stats = crawler.stats
+        return pipe
 
     def open_spider(self, spider):
-        self.client = MongoClient(self.mongo_uri)
-        self.col = self.client[self.mongo_db][self.mongo_collection]
-        self.col.create_index([("url", ASCENDING)], unique=True)
+        self.scraper = spider.name
+        self.col = get_client(self.mongo_uri)[self.mongo_db][self.mongo_collection]
+        ensure_schema(self.col, schema="books_labirint")
+        self.fingerprints = {
+            d["url"]: d.get("fingerprint")
+            for d in self.col.find({}, {"_id": 0, "url": 1, "fingerprint": 1})
+        }
+        self.changed: list[UpdateOne] = []
+        self.unchanged: list[str] = []
 
     def close_spider(self, spider):
-        self.client.close()
+        # клиент общий для процесса (реестр common.mongo) — его не закрываем
+        self.flush()
+
+    def flush(self):
+        if not self.changed and not self.unchanged:
+            return
+        with metrics.timer("stage_seconds", scraper=self.scraper, stage="db_write"):
+            if self.changed:
+                self.col.bulk_write(self.changed, ordered=False)
+                self.changed = []
+            if self.unchanged:
+                self.col.update_many({"url": {"$in": self.unchanged}}, {"$set": {"last_seen": datetime.utcnow()}})
+                self.unchanged = []
 
     def process_item(self, item, spider):
         doc = dict(item)
-        # upsert по URL, чтобы не дублировать
-        self.col.update_one(
-            {"url": doc["url"]},
-            {"$set": doc},
-            upsert=True
-        )
+        fp = book_fingerprint(doc)
+        if self.fingerprints.get(doc["url"]) == fp:
+            self.unchanged.append(doc["url"])
+            self.stats.inc_value("books/db/unchanged")
+        else:
+            self.fingerprints[doc["url"]] = fp
+            doc["fingerprint"] = fp
+            doc["last_seen"] = doc["scraped_at"]
+            # upsert по URL, чтобы не дублировать
+            self.changed.append(UpdateOne({"url": doc["url"]}, {"$set": doc}, upsert=True))
+            self.stats.inc_value("books/db/changed")
+
+        if len(self.changed) + len(self.unchanged) >= self.batch_size:
+            self.flush()
         return item
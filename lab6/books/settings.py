@@ -1,3 +1,6 @@
+import os
+from urllib.parse import urlsplit
+
 BOT_NAME = "books"
 
 SPIDER_MODULES = ["books.spiders"]
@@ -14,7 +17,21 @@ ITEM_PIPELINES = {
 # -------- Splash интеграция (scrapy-splash) --------
 SPLASH_URL = "http://localhost:8050"
 
+# пул Splash-инстансов (books.middlewares.SplashPoolMiddleware), через запятую
+SPLASH_URLS = os.getenv("SPLASH_URLS", SPLASH_URL).split(",")
+SPLASH_POOL_MAX_INFLIGHT = 4
+SPLASH_POOL_ERROR_THRESHOLD = 3
+SPLASH_POOL_COOLDOWN = 30
+# лимит одновременных рендеров на инстанс — только на его download slot
+# (ключ как SplashPoolMiddleware.slot_key); обычные HTTP-запросы к
+# www.labirint.ru остаются на стандартном CONCURRENT_REQUESTS_PER_DOMAIN
+DOWNLOAD_SLOTS = {
+    "splash:" + urlsplit(url).netloc: {"concurrency": SPLASH_POOL_MAX_INFLIGHT}
+    for url in SPLASH_URLS
+}
+
 DOWNLOADER_MIDDLEWARES = {
+    "books.middlewares.SplashPoolMiddleware": 720,
     "scrapy_splash.SplashCookiesMiddleware": 723,
     "scrapy_splash.SplashMiddleware": 725,
     "scrapy.downloadermiddlewares.httpcompression.HttpCompressionMiddleware": 810,
@@ -25,7 +42,35 @@ SPIDER_MIDDLEWARES = {
 }
 
 DUPEFILTER_CLASS = "scrapy_splash.SplashAwareDupeFilter"
-HTTPCACHE_STORAGE = "scrapy_splash.SplashAwareFSCacheStorage"
+
+# кэш ответов (и Splash-рендеров) в одном sqlite-файле со сжатыми телами;
+# python replay.py прогоняет parse_book по нему без Splash.
+# Только по запросу (LABIRINT_HTTPCACHE=1 — записать корпус для replay):
+# в живом прогоне книга из кэша не покажет изменившуюся цену
+HTTPCACHE_ENABLED = os.getenv("LABIRINT_HTTPCACHE", "0") == "1"
+HTTPCACHE_STORAGE = "books.httpcache.SqliteRenderCacheStorage"
+HTTPCACHE_DIR = "httpcache"
+HTTPCACHE_EXPIRATION_SECS = int(os.getenv("LABIRINT_HTTPCACHE_EXPIRATION_SECS", str(7 * 24 * 3600)))
+# сбои Splash/сайта не кэшируем: иначе ретрай получит тот же 503 из кэша на неделю
+HTTPCACHE_IGNORE_HTTP_CODES = [429, 500, 502, 503, 504]
+# страницы рейтинга в кэш не идут (meta dont_cache в list_request) — новые книги видны сразу
 
 DOWNLOAD_TIMEOUT = 90
 RETRY_TIMES = 2
+
+# -------- обход рейтинга и конкуренция --------
+# сколько страниц рейтинга обходить (0 — все)
+LABIRINT_MAX_PAGES = int(os.getenv("LABIRINT_MAX_PAGES", "0"))
+CONCURRENT_REQUESTS = 32
+
+# лимит рендеров на Splash-инстанс подстраивается по латентности и ошибкам
+EXTENSIONS = {
+    "books.extensions.SplashConcurrencyController": 500,
+    # тайминги по этапам; включается SCRAPER_METRICS=1 (см. common/metrics.py)
+    "common.metrics.ScrapyMetrics": 0,
+}
+SPLASH_CC_INTERVAL = 5
+SPLASH_CC_TARGET_LATENCY = 5.0
+SPLASH_CC_MAX_ERROR_RATE = 0.2
+SPLASH_CC_MIN = 1
+SPLASH_CC_MAX = 16
@@ -1,12 +1,16 @@
 import re
 from datetime import datetime
-from urllib.parse import urljoin
+from urllib.parse import urlencode, urljoin
 
 import scrapy
 from scrapy_splash import SplashRequest
 
 from books.items import BookItem
 
+import repo_root  # noqa: F401  (общий пакет common/ — в корне репозитория)
+from common.extract import Field, format_stats
+from common.metrics import metrics
+
 
 BASE = "https://www.labirint.ru"
 START_URL = "https://www.labirint.ru/rating/"
@@ -51,9 +55,67 @@ def extract_rating(text: str) -> float | None:
     return float(m.group(1).replace(",", "."))
 
 
+LIST_BOOK_HREFS = Field("labirint.book_hrefs", [
+    ("books_anchors", '//a[contains(@href, "/books/")]/@href'),
+])
+LIST_NEXT_PAGE = Field("labirint.next_page", [
+    ("rel_next_link", '//link[@rel="next"]/@href'),
+    ("rel_next_anchor", '//a[@rel="next"]/@href'),
+    ("pagination_next", '//*[contains(@class, "pagination-next")]/descendant-or-self::a/@href'),
+])
+BOOK_TITLE = Field("labirint.title", [("h1", "normalize-space(//h1)")])
+# Авторы: на Labirint обычно ссылки вида /authors/ID/
+BOOK_AUTHORS = Field("labirint.authors", [
+    ("authors_links", '//a[contains(@href, "/authors/")]/text()'),
+])
+# Рейтинг: сначала элемент, в тексте которого прямо есть "Рейтинг" (линейный проход
+# по текстовым узлам), и только потом старый документный //*[contains(., ...)]
+BOOK_RATING = Field(
+    "labirint.rating",
+    [
+        ("rating_text_parent", 'normalize-space(//text()[contains(., "Рейтинг")]/..)'),
+        ("rating_any_element", 'normalize-space(//*[contains(., "Рейтинг")][1])'),
+    ],
+    accept=lambda v: extract_rating(v) is not None,
+)
+# Цены: ограниченный блок — вокруг текста про скидку или элемент с "price" в классе.
+# //*[contains(., "%")] сюда не годится: первым совпадает <html> (проценты есть
+# в инлайн-CSS/JS), то есть весь документ. fallback: весь текст страницы —
+# ему верим только после рендера (см. UNBOUNDED_PRICE_ZONES)
+BOOK_PRICE_ZONE = Field(
+    "labirint.price_zone",
+    [
+        ("discount_text_block",
+         'normalize-space((//body//text()[contains(., "Скидка") or contains(., "Вы сэкономите")])[1]/../..)'),
+        ("price_class_block",
+         'normalize-space((//body//*[contains(@class, "price")][not(self::script or self::style)])[1])'),
+        ("body", "normalize-space(//body)"),
+    ],
+    accept=lambda v: extract_prices(v) != (None, None),
+)
+
+
+# зоны цены размером со страницу: на HTTP-проходе цену из них не берём
+UNBOUNDED_PRICE_ZONES = {"body"}
+
+# без этих полей книгу считаем неразобранной и перерисовываем через Splash
+REQUIRED_FIELDS = ("title", "price_discount")
+
+# планировщик берёт запросы с большим priority раньше: сначала книги
+# с уже известных страниц рейтинга, потом следующие страницы рейтинга
+BOOK_PRIORITY = 10
+LIST_PRIORITY = 0
+
+
 class LabirintBooksSpider(scrapy.Spider):
     name = "labirint_books"
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # все книги, уже встреченные в рейтинге: на конце рейтинга сайт
+        # может отдавать ту же страницу для любого ?page=N
+        self.seen_books: set[str] = set()
+
     # небольшой Lua-скрипт: просто отрендерить страницу
     splash_args = {
         "wait": 1.0,
@@ -62,34 +124,63 @@ class LabirintBooksSpider(scrapy.Spider):
         "resource_timeout": 15,
     }
 
-    def start_requests(self):
-        yield SplashRequest(
-            url=START_URL,
+    def list_request(self, url: str, page: int) -> SplashRequest:
+        return SplashRequest(
+            url=url,
             callback=self.parse_list,
             endpoint="render.html",
             args=self.splash_args,
+            # рейтинг меняется — не кэшируем, иначе перезапуск неделю видит старый список
+            meta={"labirint_page": page, "dont_cache": True},
+            priority=LIST_PRIORITY,
         )
 
+    def start_requests(self):
+        yield self.list_request(START_URL, page=1)
+
+    def next_page_url(self, response, page: int) -> str:
+        href = LIST_NEXT_PAGE.extract(response.selector.root)
+        if href:
+            return urljoin(BASE, href)
+        # ссылки "дальше" в вёрстке не нашли — пробуем ?page=N+1
+        return START_URL + "?" + urlencode({"page": page + 1})
+
     def parse_list(self, response: scrapy.http.Response):
         # ссылки на книги
-        hrefs = response.xpath('//a[contains(@href, "/books/")]/@href').getall()
-        seen = set()
+        with metrics.timer("stage_seconds", scraper=self.name, stage="parse"):
+            hrefs = LIST_BOOK_HREFS.extract(response.selector.root, default=[])
         urls = []
         for h in hrefs:
             u = urljoin(BASE, h)
-            if u in seen:
+            if u in self.seen_books:
                 continue
-            seen.add(u)
+            self.seen_books.add(u)
             urls.append(u)
 
-        # чтобы быстро показать преподу — ограничим
-        for u in urls[:50]:
-            yield SplashRequest(
-                url=u,
-                callback=self.parse_book,
-                endpoint="render.html",
-                args=self.splash_args,
-            )
+        # карточки книг сначала обычным HTTP, Splash — только если не хватило полей
+        for u in urls:
+            yield scrapy.Request(u, callback=self.parse_book, priority=BOOK_PRIORITY)
+
+        # пагинация: пока страница даёт новые книги и не упёрлись в LABIRINT_MAX_PAGES (0 — без лимита)
+        page = response.meta.get("labirint_page", 1)
+        max_pages = self.settings.getint("LABIRINT_MAX_PAGES", 0)
+        if urls and (max_pages == 0 or page < max_pages):
+            self.crawler.stats.inc_value("labirint/list/pages")
+            yield self.list_request(self.next_page_url(response, page), page=page + 1)
+
+    def render_book_request(self, url: str) -> SplashRequest:
+        return SplashRequest(
+            url=url,
+            callback=self.parse_book,
+            endpoint="render.html",
+            args=self.splash_args,
+            meta={"labirint_rendered": True},
+            dont_filter=True,
+            priority=BOOK_PRIORITY,
+        )
+
+    def closed(self, reason):
+        self.logger.info("Selector stats:\n%s", format_stats())
 
     def parse_book(self, response: scrapy.http.Response):
         item = BookItem()
@@ -98,30 +189,37 @@ class LabirintBooksSpider(scrapy.Spider):
         item["scraped_at"] = datetime.utcnow()
         item["project_tag"] = "lesson6_scrapy_splash_books"
 
-        # Название
-        item["title"] = (response.xpath("normalize-space(//h1)").get() or "").strip()
-
-        # Авторы: на Labirint обычно ссылки вида /authors/ID/
-        authors = response.xpath('//a[contains(@href, "/authors/")]/text()').getall()
-        authors = [a.strip() for a in authors if a and a.strip()]
-        item["authors"] = list(dict.fromkeys(authors))  # уникальные, сохраняя порядок
-
-        # Рейтинг: пробуем вытащить из видимой зоны рядом со словом "Рейтинг"
-        rating_block = response.xpath(
-            'normalize-space(//*[contains(., "Рейтинг")][1])'
-        ).get()
-        item["rating"] = extract_rating(rating_block)
-
-        # Цены: берём кусок текста около скидки/цены (часто вверху страницы)
-        # fallback: если не нашли — ищем любые числа в тексте страницы (хуже, но работает)
-        price_zone = response.xpath(
-            'normalize-space((//*[contains(., "Скидка") or contains(., "%") or contains(., "Вы сэкономите")])[1])'
-        ).get()
-        if not price_zone:
-            price_zone = response.xpath("normalize-space(//body)").get()
-
-        base, discount = extract_prices(price_zone)
-        item["price_base"] = base
-        item["price_discount"] = discount
+        with metrics.timer("stage_seconds", scraper=self.name, stage="parse"):
+            root = response.selector.root
+
+            item["title"] = BOOK_TITLE.extract(root, default="")
+
+            authors = BOOK_AUTHORS.extract(root, default=[])
+            authors = [a.strip() for a in authors if a and a.strip()]
+            item["authors"] = list(dict.fromkeys(authors))  # уникальные, сохраняя порядок
+
+            item["rating"] = extract_rating(BOOK_RATING.extract(root))
+
+            price_label, price_zone = BOOK_PRICE_ZONE.extract_labeled(root)
+            base, discount = extract_prices(price_zone)
+            if price_label in UNBOUNDED_PRICE_ZONES and not response.meta.get("labirint_rendered"):
+                # в тексте всей страницы цену даст любое число (год, ISBN, страницы) —
+                # на HTTP-проходе такой результат не считаем ценой, пусть рендерит Splash
+                base, discount = None, None
+            item["price_base"] = base
+            item["price_discount"] = discount
+
+        stats = self.crawler.stats
+        complete = all(item.get(f) for f in REQUIRED_FIELDS)
+        if response.meta.get("labirint_rendered"):
+            stats.inc_value("labirint/book/rendered")
+            if not complete:
+                stats.inc_value("labirint/book/rendered_incomplete")
+        else:
+            stats.inc_value("labirint/book/http")
+            if not complete:
+                stats.inc_value("labirint/book/splash_fallback")
+                yield self.render_book_request(response.url)
+                return
 
         yield item
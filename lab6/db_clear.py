@@ -1,17 +1,16 @@
-import os
-from pymongo import MongoClient
+import sys
+
+import repo_root  # noqa: F401  (общий пакет common/ — в корне репозитория)
+from common.retention import main as retention_main
+
+# project_tag, который пишет спайдер
+PROJECT_TAG = "lesson6_scrapy_splash_books"
 
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-MONGO_DB = os.getenv("MONGO_DB", "parsing_hw")
-MONGO_COLLECTION = os.getenv("MONGO_COLLECTION_BOOKS", "books_labirint")
 
 def main():
-    client = MongoClient(MONGO_URI)
-    col = client[MONGO_DB][MONGO_COLLECTION]
+    # порционное удаление по _id (common/retention.py); --resume продолжит прерванное
+    retention_main(["purge", "books", "--filter", f"project_tag={PROJECT_TAG}", *sys.argv[1:]])
 
-    res = col.delete_many({"project_tag": "lesson6_scrapy_splash_books"})
-    print("Deleted:", res.deleted_count)
-    print("Now total:", col.count_documents({}))
 
 if __name__ == "__main__":
     main()
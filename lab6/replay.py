@@ -0,0 +1,64 @@
+"""
+Офлайн-replay: прогоняем parse_book по страницам из кэша рендеров без Splash.
+
+Кэш пишется только по запросу: LABIRINT_HTTPCACHE=1 scrapy crawl labirint_books.
+
+Использование (из папки lab6):
+    python replay.py                       -> items в replay_items.jsonl
+    python replay.py --out items.jsonl --mongo   -> ещё и в Mongo через MongoPipeline
+"""
+import argparse
+import json
+
+from scrapy.http import HtmlResponse, Request
+from scrapy.utils.project import get_project_settings
+from scrapy.utils.test import get_crawler
+
+from books.httpcache import SqliteRenderCacheStorage, iter_cached_pages
+from books.pipelines import MongoPipeline
+from books.spiders.labirint_spider import LabirintBooksSpider
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Re-run parse_book over cached renders")
+    ap.add_argument("--out", default="replay_items.jsonl")
+    ap.add_argument("--mongo", action="store_true", help="писать items в Mongo через MongoPipeline")
+    args = ap.parse_args()
+
+    settings = get_project_settings()
+    crawler = get_crawler(LabirintBooksSpider, settings_dict=settings.copy_to_dict())
+    spider = LabirintBooksSpider.from_crawler(crawler)
+
+    cache_path = SqliteRenderCacheStorage.path_for(SqliteRenderCacheStorage(settings).cachedir, spider.name)
+
+    pipeline = None
+    if args.mongo:
+        pipeline = MongoPipeline.from_crawler(crawler)
+        pipeline.open_spider(spider)
+
+    pages = items = incomplete = 0
+    with open(args.out, "w", encoding="utf-8") as out:
+        for page_url, rendered, body in iter_cached_pages(cache_path, url_contains="/books/"):
+            pages += 1
+            request = Request(page_url, meta={"labirint_rendered": rendered})
+            response = HtmlResponse(url=page_url, body=body, encoding="utf-8", request=request)
+            for result in spider.parse_book(response):
+                if isinstance(result, Request):
+                    # полей не хватило — в живом прогоне тут был бы Splash-рендер
+                    incomplete += 1
+                    continue
+                items += 1
+                if pipeline:
+                    pipeline.process_item(result, spider)
+                out.write(json.dumps(dict(result), ensure_ascii=False, default=str) + "\n")
+
+    if pipeline:
+        pipeline.close_spider(spider)
+
+    print(f"Cache: {cache_path}")
+    print(f"Pages: {pages}, items: {items}, would need Splash: {incomplete}")
+    print(f"Items written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()